@@ -7,76 +7,78 @@ from conclave.config import CodeGenConfig, SharemindCodeGenConfig, OblivcConfig,
 from conclave.utils import defCol
 
 
-def protocol_mpc(all_pids: list):
-    pid_col_meds = "0"
-    med_col_meds = "4"
-    date_col_meds = "7"
+# column layout shared by the MPC and local protocols
+PID_COL_MEDS = "0"
+MED_COL_MEDS = "4"
+DATE_COL_MEDS = "7"
+
+PID_COL_DIAGS = "8"
+DIAG_COL_DIAGS = "16"
+DATE_COL_DIAGS = "18"
 
-    pid_col_diags = "8"
-    diag_col_diags = "16"
-    date_col_diags = "18"
+NUM_MED_COLS = 8
+NUM_DIAG_COLS = 13
 
-    num_med_cols = 8
-    num_diag_cols = 13
 
-    left_medication_cols = [defCol(str(i), "INTEGER", 1) for i in range(num_med_cols)]
+def protocol_mpc(all_pids: list):
+    left_medication_cols = [defCol(str(i), "INTEGER", 1) for i in range(NUM_MED_COLS)]
     # public PID column
-    left_medication_cols[0] = defCol(pid_col_meds, "INTEGER", all_pids)
+    left_medication_cols[0] = defCol(PID_COL_MEDS, "INTEGER", all_pids)
     left_medication = cc.create("left_medication", left_medication_cols, {1})
 
-    left_diagnosis_cols = [defCol(str(i + num_med_cols), "INTEGER", 1) for i in range(num_diag_cols)]
+    left_diagnosis_cols = [defCol(str(i + NUM_MED_COLS), "INTEGER", 1) for i in range(NUM_DIAG_COLS)]
     # public PID column
-    left_diagnosis_cols[0] = defCol(pid_col_diags, "INTEGER", all_pids)
+    left_diagnosis_cols[0] = defCol(PID_COL_DIAGS, "INTEGER", all_pids)
     left_diagnosis = cc.create("left_diagnosis", left_diagnosis_cols, {1})
 
-    right_medication_cols = [defCol(str(i), "INTEGER", 2) for i in range(num_med_cols)]
+    right_medication_cols = [defCol(str(i), "INTEGER", 2) for i in range(NUM_MED_COLS)]
     # public PID column
-    right_medication_cols[0] = defCol(pid_col_meds, "INTEGER", all_pids)
+    right_medication_cols[0] = defCol(PID_COL_MEDS, "INTEGER", all_pids)
     right_medication = cc.create("right_medication", right_medication_cols, {2})
 
-    right_diagnosis_cols = [defCol(str(i + num_med_cols), "INTEGER", 2) for i in range(num_diag_cols)]
+    right_diagnosis_cols = [defCol(str(i + NUM_MED_COLS), "INTEGER", 2) for i in range(NUM_DIAG_COLS)]
     # public PID column
-    right_diagnosis_cols[0] = defCol(pid_col_diags, "INTEGER", all_pids)
+    right_diagnosis_cols[0] = defCol(PID_COL_DIAGS, "INTEGER", all_pids)
     right_diagnosis = cc.create("right_diagnosis", right_diagnosis_cols, {2})
 
     # Manual slicing
-    left_keys = cc.union(left_medication, left_diagnosis, "left_pids", pid_col_meds, pid_col_diags)
-    right_keys = cc.union(right_medication, right_diagnosis, "right_pids", pid_col_meds, pid_col_diags)
+    left_keys = cc.union(left_medication, left_diagnosis, "left_pids", PID_COL_MEDS, PID_COL_DIAGS)
+    right_keys = cc.union(right_medication, right_diagnosis, "right_pids", PID_COL_MEDS, PID_COL_DIAGS)
 
-    left_shared_pids = cc._pub_intersect(left_keys, "a_left_shared_pids", pid_col_meds)
+    left_shared_pids = cc._pub_intersect(left_keys, "a_left_shared_pids", PID_COL_MEDS)
     cc._persist(left_shared_pids, "a_left_shared_pids")
-    right_shared_pids = cc._pub_intersect(right_keys, "a_right_shared_pids", pid_col_meds, is_server=False)
+    right_shared_pids = cc._pub_intersect(right_keys, "a_right_shared_pids", PID_COL_MEDS, is_server=False)
     cc._persist(right_shared_pids, "a_right_shared_pids")
 
     left_medication_proj = cc.project(left_medication, "left_medication_proj",
-                                      [pid_col_meds, med_col_meds, date_col_meds])
-    left_medication_shared = cc.filter_by(left_medication_proj, "left_medication_shared", pid_col_meds,
+                                      [PID_COL_MEDS, MED_COL_MEDS, DATE_COL_MEDS])
+    left_medication_shared = cc.filter_by(left_medication_proj, "left_medication_shared", PID_COL_MEDS,
                                           left_shared_pids)
 
     left_diagnosis_proj = cc.project(left_diagnosis, "left_diagnosis_proj",
-                                     [pid_col_diags, diag_col_diags, date_col_diags])
-    left_diagnosis_shared = cc.filter_by(left_diagnosis_proj, "left_diagnosis_shared", pid_col_diags, left_shared_pids)
+                                     [PID_COL_DIAGS, DIAG_COL_DIAGS, DATE_COL_DIAGS])
+    left_diagnosis_shared = cc.filter_by(left_diagnosis_proj, "left_diagnosis_shared", PID_COL_DIAGS, left_shared_pids)
 
     right_medication_proj = cc.project(right_medication, "right_medication_proj",
-                                       [pid_col_meds, med_col_meds, date_col_meds])
-    right_medication_shared = cc.filter_by(right_medication_proj, "right_medication_shared", pid_col_meds,
+                                       [PID_COL_MEDS, MED_COL_MEDS, DATE_COL_MEDS])
+    right_medication_shared = cc.filter_by(right_medication_proj, "right_medication_shared", PID_COL_MEDS,
                                            right_shared_pids)
 
     right_diagnosis_proj = cc.project(right_diagnosis, "right_diagnosis_proj",
-                                      [pid_col_diags, diag_col_diags, date_col_diags])
-    right_diagnosis_shared = cc.filter_by(right_diagnosis_proj, "right_diagnosis_shared", pid_col_diags,
+                                      [PID_COL_DIAGS, DIAG_COL_DIAGS, DATE_COL_DIAGS])
+    right_diagnosis_shared = cc.filter_by(right_diagnosis_proj, "right_diagnosis_shared", PID_COL_DIAGS,
                                           right_shared_pids)
 
     # Slicing done
     medication_shared = cc.concat([left_medication_shared, right_medication_shared], "medication_shared")
     diagnosis_shared = cc.concat([left_diagnosis_shared, right_diagnosis_shared], "diagnosis_shared")
 
-    joined = cc.join(medication_shared, diagnosis_shared, "joined", [pid_col_meds], [pid_col_diags])
-    cases = cc.cc_filter(joined, "cases", date_col_diags, "<", other_col_name=date_col_meds)
-    aspirin = cc.cc_filter(cases, "aspirin", med_col_meds, "==", scalar=1)
-    heart_patients = cc.cc_filter(aspirin, "heart_patients", diag_col_diags, "==", scalar=1)
+    joined = cc.join(medication_shared, diagnosis_shared, "joined", [PID_COL_MEDS], [PID_COL_DIAGS])
+    cases = cc.cc_filter(joined, "cases", DATE_COL_DIAGS, "<", other_col_name=DATE_COL_MEDS)
+    aspirin = cc.cc_filter(cases, "aspirin", MED_COL_MEDS, "==", scalar=1)
+    heart_patients = cc.cc_filter(aspirin, "heart_patients", DIAG_COL_DIAGS, "==", scalar=1)
 
-    cc.collect(cc.distinct_count(heart_patients, "actual_mpc", pid_col_meds), 1)
+    cc.collect(cc.distinct_count(heart_patients, "actual_mpc", PID_COL_MEDS), 1)
 
     return {
         left_medication,
@@ -87,38 +89,27 @@ def protocol_mpc(all_pids: list):
 
 
 def protocol_local(suffix: str, pid: int):
-    pid_col_meds = "0"
-    med_col_meds = "4"
-    date_col_meds = "7"
-
-    pid_col_diags = "8"
-    diag_col_diags = "16"
-    date_col_diags = "18"
-
-    num_med_cols = 8
-    num_diag_cols = 13
-
-    left_medication_cols = [defCol(str(i), "INTEGER", pid) for i in range(num_med_cols)]
+    left_medication_cols = [defCol(str(i), "INTEGER", pid) for i in range(NUM_MED_COLS)]
     medication = cc.create(suffix + "_medication", left_medication_cols, {pid})
-    left_diagnosis_cols = [defCol(str(i + num_med_cols), "INTEGER", pid) for i in range(num_diag_cols)]
+    left_diagnosis_cols = [defCol(str(i + NUM_MED_COLS), "INTEGER", pid) for i in range(NUM_DIAG_COLS)]
     diagnosis = cc.create(suffix + "_diagnosis", left_diagnosis_cols, {pid})
 
-    shared_pids = cc.create("a_{}_shared_pids".format(suffix), [defCol(pid_col_meds, "INTEGER", pid)], {pid})
+    shared_pids = cc.create("a_{}_shared_pids".format(suffix), [defCol(PID_COL_MEDS, "INTEGER", pid)], {pid})
 
     # only keep relevant columns
-    medication_proj = cc.project(medication, "medication_proj", [pid_col_meds, med_col_meds, date_col_meds])
-    medication_mine = cc.filter_by(medication_proj, "medication_mine", pid_col_meds, shared_pids, use_not_in=True)
+    medication_proj = cc.project(medication, "medication_proj", [PID_COL_MEDS, MED_COL_MEDS, DATE_COL_MEDS])
+    medication_mine = cc.filter_by(medication_proj, "medication_mine", PID_COL_MEDS, shared_pids, use_not_in=True)
 
-    diagnosis_proj = cc.project(diagnosis, "diagnosis_proj", [pid_col_diags, diag_col_diags, date_col_diags])
-    diagnosis_mine = cc.filter_by(diagnosis_proj, "diagnosis_mine", pid_col_diags, shared_pids, use_not_in=True)
+    diagnosis_proj = cc.project(diagnosis, "diagnosis_proj", [PID_COL_DIAGS, DIAG_COL_DIAGS, DATE_COL_DIAGS])
+    diagnosis_mine = cc.filter_by(diagnosis_proj, "diagnosis_mine", PID_COL_DIAGS, shared_pids, use_not_in=True)
 
-    joined = cc.join(medication_mine, diagnosis_mine, "joined", [pid_col_meds], [pid_col_diags])
+    joined = cc.join(medication_mine, diagnosis_mine, "joined", [PID_COL_MEDS], [PID_COL_DIAGS])
 
-    cases = cc.cc_filter(joined, "cases", date_col_diags, "<", other_col_name=date_col_meds)
-    aspirin = cc.cc_filter(cases, "aspirin", med_col_meds, "==", scalar=1)
-    heart_patients = cc.cc_filter(aspirin, "heart_patients", diag_col_diags, "==", scalar=1)
+    cases = cc.cc_filter(joined, "cases", DATE_COL_DIAGS, "<", other_col_name=DATE_COL_MEDS)
+    aspirin = cc.cc_filter(cases, "aspirin", MED_COL_MEDS, "==", scalar=1)
+    heart_patients = cc.cc_filter(aspirin, "heart_patients", DIAG_COL_DIAGS, "==", scalar=1)
 
-    cc.distinct_count(heart_patients, "actual_" + suffix, pid_col_meds)
+    cc.distinct_count(heart_patients, "actual_" + suffix, PID_COL_MEDS)
 
     return {medication, diagnosis}
 
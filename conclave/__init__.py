@@ -1,17 +1,7 @@
 import conclave.comp as comp
 import conclave.dag as condag
-import conclave.partition as part
-from conclave.codegen import scotch
-from conclave.codegen.python import PythonCodeGen
-from conclave.codegen.sharemind import SharemindCodeGen
-from conclave.codegen.spark import SparkCodeGen
-from conclave.codegen.oblivc import OblivcCodeGen
-from conclave.codegen.jiff import JiffCodeGen
-from conclave.codegen.single_party import SinglePartyCodegen
 from conclave.config import CodeGenConfig
 from conclave.dispatch import dispatch_all
-from conclave.net import SalmonPeer
-from conclave.net import setup_peer
 
 
 def generate_code(protocol: callable, cfg: CodeGenConfig, mpc_frameworks: list,
@@ -40,28 +30,34 @@ def generate_code(protocol: callable, cfg: CodeGenConfig, mpc_frameworks: list,
             dag = comp.rewrite_dag(dag, cfg)
 
         # partition into sub-dags that will run in specific frameworks
+        import conclave.partition as part
         mapping = part.heupart(dag, mpc_frameworks, local_frameworks)
 
         # for each sub-dag run code gen and add resulting job to job queue
         for job_num, (framework, sub_dag, stored_with) in enumerate(mapping):
             print(job_num, framework)
             if framework == "sharemind":
+                from conclave.codegen.sharemind import SharemindCodeGen
                 name = "{}-sharemind-job-{}".format(cfg.name, job_num)
                 job = SharemindCodeGen(cfg, sub_dag, cfg.pid).generate(name, cfg.output_path)
                 job_queue.append(job)
             elif framework == "spark":
+                from conclave.codegen.spark import SparkCodeGen
                 name = "{}-spark-job-{}".format(cfg.name, job_num)
                 job = SparkCodeGen(cfg, sub_dag).generate(name, cfg.output_path)
                 job_queue.append(job)
             elif framework == "python":
+                from conclave.codegen.python import PythonCodeGen
                 name = "{}-python-job-{}".format(cfg.name, job_num)
                 job = PythonCodeGen(cfg, sub_dag).generate(name, cfg.output_path)
                 job_queue.append(job)
             elif framework == "obliv-c":
+                from conclave.codegen.oblivc import OblivcCodeGen
                 name = "{}-oblivc-job-{}".format(cfg.name, job_num)
                 job = OblivcCodeGen(cfg, sub_dag, cfg.pid).generate(name, cfg.output_path)
                 job_queue.append(job)
             elif framework == "jiff":
+                from conclave.codegen.jiff import JiffCodeGen
                 name = "{}-jiff-job-{}".format(cfg.name, job_num)
                 job = JiffCodeGen(cfg, sub_dag, cfg.pid).generate(name, cfg.output_path)
                 job_queue.append(job)
@@ -75,6 +71,7 @@ def generate_code(protocol: callable, cfg: CodeGenConfig, mpc_frameworks: list,
     else:
 
         assert len(mpc_frameworks) == 1
+        from conclave.codegen.single_party import SinglePartyCodegen
 
         if mpc_frameworks[0] == "single-party-spark":
 
@@ -139,4 +136,5 @@ def generate_and_dispatch(protocol: callable, conclave_config: CodeGenConfig, mp
 
 
 def _setup_networked_peer(network_config):
+    from conclave.net import setup_peer
     return setup_peer(network_config)
@@ -100,46 +100,46 @@ class JiffCodeGen(CodeGen):
     def _generate(self, job_name: [str, None], output_directory: str):
         """ Generate code for DAG passed"""
 
-        op_code = ""
+        # per-operator fragments, joined once at the end
+        op_code_parts = []
 
         # topological traversal
         nodes = self.dag.top_sort()
 
         for node in nodes:
             if isinstance(node, Aggregate):
-                op_code += self._generate_aggregate(node)
+                op_code_parts.append(self._generate_aggregate(node))
             elif isinstance(node, Concat):
-                op_code += self._generate_concat(node)
+                op_code_parts.append(self._generate_concat(node))
             elif isinstance(node, Close):
-                op_code += self._generate_close(node)
+                op_code_parts.append(self._generate_close(node))
             elif isinstance(node, Create):
                 pass
             elif isinstance(node, Join):
-                op_code += self._generate_join(node)
+                op_code_parts.append(self._generate_join(node))
             elif isinstance(node, Open):
-                op_code += self._generate_open(node)
+                op_code_parts.append(self._generate_open(node))
             elif isinstance(node, Project):
-                op_code += self._generate_project(node)
+                op_code_parts.append(self._generate_project(node))
             elif isinstance(node, Multiply):
-                op_code += self._generate_multiply(node)
+                op_code_parts.append(self._generate_multiply(node))
             elif isinstance(node, Divide):
-                op_code += self._generate_divide(node)
+                op_code_parts.append(self._generate_divide(node))
             elif isinstance(node, SortBy):
-                op_code += self._generate_sort_by(node)
+                op_code_parts.append(self._generate_sort_by(node))
             elif isinstance(node, ConcatCols):
-                op_code += self._generate_concat_cols(node)
+                op_code_parts.append(self._generate_concat_cols(node))
             elif isinstance(node, Open):
-                op_code += self._generate_open(node)
+                op_code_parts.append(self._generate_open(node))
             else:
                 print("encountered unknown operator type", repr(node))
 
-        return self._generate_job(job_name, op_code)
+        return self._generate_job(job_name, "".join(op_code_parts))
 
     def _generate_close(self, close_op: Close):
 
         # node.parent.out_rel.stored_with
-        copied_set = copy.deepcopy(close_op.parent.out_rel.stored_with)
-        data_holder = copied_set.pop()
+        data_holder = next(iter(close_op.parent.out_rel.stored_with))
 
         template = open(
             "{0}/create.tmpl".format(self.template_directory), 'r').read()
@@ -178,8 +178,7 @@ class JiffCodeGen(CodeGen):
         # check that the input data belongs to exactly one party
         assert(len(create_op.out_rel.stored_with) == 1)
 
-        copied_set = copy.deepcopy(create_op.out_rel.stored_with)
-        data_holder = copied_set.pop()
+        data_holder = next(iter(create_op.out_rel.stored_with))
 
         template = open(
             "{0}/create.tmpl".format(self.template_directory), 'r').read()
@@ -12,19 +12,16 @@ def write_rel(job_dir, rel_name, rel, schema_header):
     with open(path, "w") as f:
         # hack header
         f.write(schema_header + "\n")
-        for row in rel:
-            f.write(",".join([str(val) for val in row]) + "\n")
+        f.writelines(",".join(map(str, row)) + "\n" for row in rel)
 
 
 def read_rel(path_to_rel):
     rows = []
     with open(path_to_rel, "r") as f:
-        it = iter(f.readlines())
-        for raw_row in it:
+        for raw_row in f:
             # TODO: only need to do this for first row
             try:
-                split_row = [int(val) for val in raw_row.split(",")]
-                rows.append([int(val) for val in split_row])
+                rows.append([int(val) for val in raw_row.split(",")])
             except ValueError:
                 print("skipped header")
     return rows
@@ -44,45 +44,46 @@ class OblivcCodeGen(CodeGen):
     def _generate(self, job_name: [str, None], output_directory: [str, None]):
         """ Generate code for DAG passed"""
 
-        op_code = ""
+        # per-operator fragments, joined once at the end
+        op_code_parts = []
 
         # topological traversal
         nodes = self.dag.top_sort()
 
         for node in nodes:
             if isinstance(node, Aggregate):
-                op_code += self._generate_aggregate(node)
+                op_code_parts.append(self._generate_aggregate(node))
             elif isinstance(node, Concat):
-                op_code += self._generate_concat(node)
+                op_code_parts.append(self._generate_concat(node))
             elif isinstance(node, Close):
-                op_code += self._generate_close(node)
+                op_code_parts.append(self._generate_close(node))
             elif isinstance(node, Create):
                 self._set_create_params(node)
             elif isinstance(node, Join):
-                op_code += self._generate_join(node)
+                op_code_parts.append(self._generate_join(node))
             elif isinstance(node, Open):
-                op_code += self._generate_open(node)
+                op_code_parts.append(self._generate_open(node))
             elif isinstance(node, Project):
-                op_code += self._generate_project(node)
+                op_code_parts.append(self._generate_project(node))
             elif isinstance(node, Multiply):
-                op_code += self._generate_multiply(node)
+                op_code_parts.append(self._generate_multiply(node))
             elif isinstance(node, Divide):
-                op_code += self._generate_divide(node)
+                op_code_parts.append(self._generate_divide(node))
             elif isinstance(node, SortBy):
-                op_code += self._generate_sort_by(node)
+                op_code_parts.append(self._generate_sort_by(node))
             elif isinstance(node, DistinctCount):
-                op_code += self._generate_distinct_count(node)
+                op_code_parts.append(self._generate_distinct_count(node))
             elif isinstance(node, Filter):
-                op_code += self._generate_filter(node)
+                op_code_parts.append(self._generate_filter(node))
             elif isinstance(node, ConcatCols):
-                op_code += self._generate_concat_cols(node)
+                op_code_parts.append(self._generate_concat_cols(node))
             elif isinstance(node, Limit):
-                op_code += self._generate_limit(node)
+                op_code_parts.append(self._generate_limit(node))
             else:
                 print("encountered unknown operator type", repr(node))
 
         # expand top-level job template and return code
-        return self._generate_job(job_name, self.config.code_path, op_code)
+        return self._generate_job(job_name, self.config.code_path, "".join(op_code_parts))
 
     def _generate_job(self, job_name: str, code_directory: str, op_code: str):
         """
@@ -121,14 +122,14 @@ class OblivcCodeGen(CodeGen):
         Generate code to close input data for MPC computation.
         """
 
-        stored_with_set = copy.deepcopy(close_op.get_in_rel().stored_with)
+        stored_with_set = close_op.get_in_rel().stored_with
 
         template = open(
              "{0}/close.tmpl".format(self.template_directory), 'r').read()
 
         data = {
             "RELNAME": close_op.out_rel.name,
-            "STORED_WITH": stored_with_set.pop()
+            "STORED_WITH": next(iter(stored_with_set))
          }
 
         return pystache.render(template, data)
@@ -22,9 +22,7 @@ class PythonCodeGen(CodeGen):
     def _generate_outputs(self, op_code: str):
         """ Generate code to save outputs to file. """
         leaf_nodes = [node for node in self.dag.top_sort() if node.is_leaf()]
-        for leaf in leaf_nodes:
-            op_code += self._generate_output(leaf)
-        return op_code
+        return op_code + "".join(self._generate_output(leaf) for leaf in leaf_nodes)
 
     def _generate_job(self, job_name: str, code_directory: str, op_code: str):
         """ Top level code generation function. """
@@ -1,7 +1,8 @@
 """
 Workflow graph optimizations and transformations.
 """
-import copy
+import functools
+import logging
 import warnings
 
 import conclave.config as cc_conf
@@ -10,6 +11,8 @@ import conclave.lang as cc
 import conclave.utils as utils
 from conclave.utils import defCol
 
+logger = logging.getLogger(__name__)
+
 
 def push_op_node_down(top_node: ccdag.OpNode, bottom_node: ccdag.OpNode):
     """
@@ -24,16 +27,17 @@ def push_op_node_down(top_node: ccdag.OpNode, bottom_node: ccdag.OpNode):
     # remove bottom node between the bottom node's child and the top node
     ccdag.remove_between(top_node, child, bottom_node)
 
-    # we need all parents of the parent node
-    grand_parents = copy.copy(top_node.get_sorted_parents())
+    # we need all parents of the parent node (inserting below replaces
+    # the cached sorted list rather than modifying it, so no copy needed)
+    grand_parents = top_node.get_sorted_parents()
+    base_name = bottom_node.out_rel.name
 
     # we will insert the removed bottom node between
-    # each parent of the top node and the top node
+    # each parent of the top node and the top node; the
+    # detached bottom node serves as the template for each copy
     for idx, grand_parent in enumerate(grand_parents):
-        to_insert = copy.deepcopy(bottom_node)
-        to_insert.out_rel.rename(to_insert.out_rel.name + "_" + str(idx))
-        to_insert.parents = set()
-        to_insert.children = set()
+        to_insert = bottom_node.clone_detached()
+        to_insert.out_rel.rename(base_name + "_" + str(idx))
         ccdag.insert_between(grand_parent, top_node, to_insert)
         to_insert.update_stored_with()
 
@@ -71,23 +75,10 @@ def split_agg(node: ccdag.Aggregate):
 
     # Only dealing with single child case for now
     assert (len(node.children) <= 1)
-    clone = copy.deepcopy(node)
-
-    assert clone.aggregator in {"sum", "count"}
-    clone.aggregator = "sum"
-    clone.out_rel.rename(node.out_rel.name + "_obl")
-
-    assert (len(clone.group_cols) == 1)
-
-    updated_group_col = copy.deepcopy(node.out_rel.columns[0])
-    updated_group_col.idx = 0
-    updated_over_col = copy.deepcopy(node.out_rel.columns[1])
-    updated_over_col.idx = 1
-    clone.group_cols = [updated_group_col]
-    clone.agg_col = updated_over_col
-    clone.parents = set()
-    clone.children = set()
-    clone.is_mpc = True
+    assert node.aggregator in {"sum", "count"}
+    assert (len(node.group_cols) == 1)
+
+    clone = ccdag.Aggregate.make_oblivious_split(node)
     child = next(iter(node.children), None)
     ccdag.insert_between(node, child, clone)
 
@@ -101,104 +92,135 @@ def fork_node(node: ccdag.Concat):
     """
 
     # we can skip the first child
-    child_it = enumerate(copy.copy(node.get_sorted_children()))
-    next(child_it)
+    forked_children = node.get_sorted_children()[1:]
+    if not forked_children:
+        return
+    warnings.warn("hacky fork_node")
+    parents = list(node.parents)
+    base_name = node.out_rel.name
+    clones = []
     # clone node for each of the remaining children
-    for idx, child in child_it:
+    for idx, child in enumerate(forked_children, 1):
         # create clone and rename output relation to
         # avoid identical relation names for different nodes
-        clone = copy.deepcopy(node)
-        clone.out_rel.rename(node.out_rel.name + "_" + str(idx))
-        clone.parents = copy.copy(node.parents)
-        warnings.warn("hacky fork_node")
-        clone.ordered = copy.copy(node.ordered)
+        clone = node.clone_detached()
+        clone.out_rel.rename(base_name + "_" + str(idx))
+        clone.parents = parents
+        clone.ordered = list(node.ordered)
         clone.children = {child}
-        for parent in clone.parents:
-            parent.children.add(clone)
-        node.children.remove(child)
         # make cloned node the child's new parent
         child.replace_parent(node, clone)
         child.update_op_specific_cols()
+        clones.append(clone)
+    # rewire the node's parents to the clones in one pass
+    node.children.difference_update(forked_children)
+    for parent in parents:
+        parent.children.update(clones)
 
 
 class DagRewriter:
     """ Top level DAG rewrite class. Traverses DAG, reorders nodes, and applies optimizations to certain nodes. """
 
+    # Maps operator classes to the names of the methods that rewrite them. Operator subclasses that
+    # don't appear here (e.g. IndexAggregate) are handled by the method of their closest listed base class.
+    rewrite_methods = {
+        ccdag.HybridAggregate: "_rewrite_hybrid_aggregate",
+        ccdag.Aggregate: "_rewrite_aggregate",
+        ccdag.Divide: "_rewrite_divide",
+        ccdag.Project: "_rewrite_project",
+        ccdag.Filter: "_rewrite_filter",
+        ccdag.Multiply: "_rewrite_multiply",
+        ccdag.JoinFlags: "_rewrite_join_flags",
+        ccdag.PublicJoin: "_rewrite_public_join",
+        ccdag.HybridJoin: "_rewrite_hybrid_join",
+        ccdag.Join: "_rewrite_join",
+        ccdag.Concat: "_rewrite_concat",
+        ccdag.Close: "_rewrite_close",
+        ccdag.Open: "_rewrite_open",
+        ccdag.Create: "_rewrite_create",
+        ccdag.Distinct: "_rewrite_distinct",
+        ccdag.DistinctCount: "_rewrite_distinct_count",
+        ccdag.PubJoin: "_rewrite_pub_join",
+        ccdag.ConcatCols: "_rewrite_concat_cols",
+        ccdag.SortBy: "_rewrite_sort_by",
+        ccdag.FilterBy: "_rewrite_filter_by",
+        ccdag.Union: "_rewrite_union",
+        ccdag.PubIntersect: "_rewrite_pub_intersect",
+        ccdag.Persist: "_rewrite_persist",
+        ccdag.IndexesToFlags: "_rewrite_indexes_to_flags",
+        ccdag.NumRows: "_rewrite_num_rows",
+        ccdag.Blackbox: "_rewrite_blackbox",
+        ccdag.Shuffle: "_rewrite_shuffle",
+        ccdag.Index: "_rewrite_index",
+        ccdag.CompNeighs: "_rewrite_comp_neighs"
+    }
+
+    # Operator classes (including subclasses) the pass needs to visit. Passes that only act on a few operator
+    # types set this so that the traversal skips all other nodes; None means every node is visited.
+    rewrite_types = None
+
+    # Whether to refresh each visited node's operator specific columns after rewriting it, saving a separate
+    # UpdateColumns pass. Only safe for passes that visit every node and don't change relation columns.
+    update_cols_after = False
+
     def __init__(self, conclave_config: cc_conf.CodeGenConfig):
 
         self.conclave_config = conclave_config
         # If true we visit topological ordering of condag in reverse
         self.reverse = False
+        # Bound rewrite method for each operator class, so that dispatch is a single lookup per node. Operator
+        # classes whose method this pass doesn't override map to None, and their nodes are skipped entirely.
+        self._dispatch = {op_type: self._bind_rewrite_method(method_name)
+                          for op_type, method_name in self.rewrite_methods.items()}
+
+    def _bind_rewrite_method(self, method_name: str):
+        """ Returns the bound rewrite method, or None if it is DagRewriter's no-op default. """
+
+        if getattr(type(self), method_name) is getattr(DagRewriter, method_name):
+            return None
+        return getattr(self, method_name)
+
+    def _get_rewrite_method(self, op_type: type):
+        """
+        Returns the bound rewrite method for an operator class (None if the pass ignores it), resolving unlisted
+        subclasses via their MRO.
+        """
+
+        try:
+            return self._dispatch[op_type]
+        except KeyError:
+            base = next((base for base in op_type.__mro__[1:] if base in self._dispatch), None)
+            if base is None:
+                msg = "Unknown class " + op_type.__name__
+                raise Exception(msg)
+            method = self._dispatch[base]
+            # remember the resolution so subsequent nodes of this class hit the table directly
+            self._dispatch[op_type] = method
+        return method
 
     def rewrite(self, dag: ccdag.OpDag):
         """ Traverse topologically sorted DAG, inspect each node. """
-        ordered = dag.top_sort()
-        if self.reverse:
-            ordered = ordered[::-1]
+        if self.rewrite_types is None:
+            ordered = dag.cached_top_sort(self.reverse)
+        else:
+            ordered = dag.nodes_of_type(self.rewrite_types, self.reverse)
 
+        # names of visited nodes, collected for a single debug message per pass
+        visited = [] if logger.isEnabledFor(logging.DEBUG) else None
         for node in ordered:
-            print(type(self).__name__, "rewriting", node.out_rel.name)
-            if isinstance(node, ccdag.HybridAggregate):
-                self._rewrite_hybrid_aggregate(node)
-            elif isinstance(node, ccdag.Aggregate):
-                self._rewrite_aggregate(node)
-            elif isinstance(node, ccdag.Divide):
-                self._rewrite_divide(node)
-            elif isinstance(node, ccdag.Project):
-                self._rewrite_project(node)
-            elif isinstance(node, ccdag.Filter):
-                self._rewrite_filter(node)
-            elif isinstance(node, ccdag.Multiply):
-                self._rewrite_multiply(node)
-            elif isinstance(node, ccdag.JoinFlags):
-                self._rewrite_join_flags(node)
-            elif isinstance(node, ccdag.PublicJoin):
-                self._rewrite_public_join(node)
-            elif isinstance(node, ccdag.HybridJoin):
-                self._rewrite_hybrid_join(node)
-            elif isinstance(node, ccdag.Join):
-                self._rewrite_join(node)
-            elif isinstance(node, ccdag.Concat):
-                self._rewrite_concat(node)
-            elif isinstance(node, ccdag.Close):
-                self._rewrite_close(node)
-            elif isinstance(node, ccdag.Open):
-                self._rewrite_open(node)
-            elif isinstance(node, ccdag.Create):
-                self._rewrite_create(node)
-            elif isinstance(node, ccdag.Distinct):
-                self._rewrite_distinct(node)
-            elif isinstance(node, ccdag.DistinctCount):
-                self._rewrite_distinct_count(node)
-            elif isinstance(node, ccdag.PubJoin):
-                self._rewrite_pub_join(node)
-            elif isinstance(node, ccdag.ConcatCols):
-                self._rewrite_concat_cols(node)
-            elif isinstance(node, ccdag.SortBy):
-                self._rewrite_sort_by(node)
-            elif isinstance(node, ccdag.FilterBy):
-                self._rewrite_filter_by(node)
-            elif isinstance(node, ccdag.Union):
-                self._rewrite_union(node)
-            elif isinstance(node, ccdag.PubIntersect):
-                self._rewrite_pub_intersect(node)
-            elif isinstance(node, ccdag.Persist):
-                self._rewrite_persist(node)
-            elif isinstance(node, ccdag.IndexesToFlags):
-                self._rewrite_indexes_to_flags(node)
-            elif isinstance(node, ccdag.NumRows):
-                self._rewrite_num_rows(node)
-            elif isinstance(node, ccdag.Blackbox):
-                self._rewrite_blackbox(node)
-            elif isinstance(node, ccdag.Shuffle):
-                self._rewrite_shuffle(node)
-            elif isinstance(node, ccdag.Index):
-                self._rewrite_index(node)
-            elif isinstance(node, ccdag.CompNeighs):
-                self._rewrite_comp_neighs(node)
-            else:
-                msg = "Unknown class " + type(node).__name__
-                raise Exception(msg)
+            if visited is not None:
+                visited.append(node.out_rel.name)
+            self.rewrite_node(node)
+        if visited is not None:
+            logger.debug("%s rewrote %s", type(self).__name__, ", ".join(visited))
+
+    def rewrite_node(self, node: ccdag.OpNode):
+        """ Apply this pass to a single node. """
+        method = self._get_rewrite_method(type(node))
+        if method is not None:
+            method(node)
+        if self.update_cols_after:
+            node.update_op_specific_cols()
 
     def _rewrite_aggregate(self, node: ccdag.Aggregate):
         pass
@@ -288,6 +310,40 @@ class DagRewriter:
         pass
 
 
+class FuseProjections(DagRewriter):
+    """ DagRewriter subclass for merging chains of Project nodes into a single projection. """
+
+    rewrite_types = (ccdag.Project,)
+
+    def __init__(self, conclave_config: cc_conf.CodeGenConfig):
+        """ Initialize FuseProjections object. """
+
+        super(FuseProjections, self).__init__(conclave_config)
+
+    def _rewrite_project(self, node: ccdag.Project):
+        """
+        Fuse a Project node into its parent if the parent is a Project that feeds nothing else.
+
+        >>> cols_in = [defCol("a", "INTEGER", 1), defCol("b", "INTEGER", 1), defCol("c", "INTEGER", 1)]
+        >>> in_op = cc.create("rel", cols_in, {1})
+        >>> proj_a = cc.project(in_op, "proj_a", ["c", "a"])
+        >>> proj_b = cc.project(proj_a, "proj_b", ["a"])
+        >>> FuseProjections(None)._rewrite_project(proj_b)
+        >>> proj_b.parent is in_op
+        True
+        >>> [col.get_name() for col in proj_b.selected_cols]
+        ['a']
+        >>> sorted(child.out_rel.name for child in in_op.children)
+        ['proj_b']
+        """
+        parent = node.parent
+        if type(parent) is not ccdag.Project or len(parent.children) != 1:
+            return
+        # the selected columns refer to the parent's output columns, which map 1:1 onto the parent's selection
+        node.selected_cols = [parent.selected_cols[col.idx] for col in node.selected_cols]
+        ccdag.remove_between(parent.parent, node, parent)
+
+
 class MPCPushDown(DagRewriter):
     """ DagRewriter subclass for pushing MPC boundaries down in workflows. """
 
@@ -360,12 +416,28 @@ class MPCPushDown(DagRewriter):
             pass
 
     def _rewrite_aggregate(self, node: ccdag.Aggregate):
-        """ Aggregate specific pushdown logic. """
+        """
+        Aggregate specific pushdown logic.
+
+        Aggregators that do not distribute over concatenation stay a single aggregation under MPC:
+
+        >>> in_1 = cc.create("in_1", [defCol("a", "INTEGER", 1), defCol("b", "INTEGER", 1)], {1})
+        >>> in_2 = cc.create("in_2", [defCol("a", "INTEGER", 2), defCol("b", "INTEGER", 2)], {2})
+        >>> rel_op = cc.concat([in_1, in_2], "rel")
+        >>> rel_op.is_mpc = True
+        >>> agged = cc.aggregate(rel_op, "agged", ["a"], "b", "mean", "avg")
+        >>> MPCPushDown(None)._rewrite_aggregate(agged)
+        >>> agged.is_mpc, agged.parent is rel_op
+        (True, True)
+        >>> len(agged.children), rel_op.children == {agged}
+        (0, True)
+        """
 
         parent = next(iter(node.parents))
         if parent.is_mpc:
             if isinstance(parent, ccdag.Concat) and parent.is_boundary():
-                if node.aggregator != "mean" and node.aggregator != "std_dev":
+                # only aggregators that distribute over concatenation can be pre-aggregated locally
+                if node.aggregator in {"sum", "count"}:
                     split_agg(node)
                     push_op_node_down(parent, node)
                     parent.update_out_rel_cols()
@@ -452,6 +524,9 @@ class MPCPushDown(DagRewriter):
 class MPCPushUp(DagRewriter):
     """ DagRewriter subclass for pushing MPC boundary up in workflows. """
 
+    # Also does the work of UpdateColumns, which rewrite_dag no longer runs separately
+    update_cols_after = True
+
     def __init__(self, conclave_config: cc_conf.CodeGenConfig):
         """ Initialize MPCPushUp object. """
 
@@ -464,7 +539,7 @@ class MPCPushUp(DagRewriter):
 
         par = next(iter(node.parents))
         if node.is_reversible() and node.is_lower_boundary() and not par.is_root():
-            node.get_in_rel().stored_with = copy.copy(node.out_rel.stored_with)
+            node.get_in_rel().stored_with = node.out_rel.stored_with
             node.is_mpc = False
 
     def _rewrite_divide(self, node: ccdag.Divide):
@@ -502,7 +577,7 @@ class MPCPushUp(DagRewriter):
             out_stored_with = node.out_rel.stored_with
             for par in node.parents:
                 if not par.is_root():
-                    par.out_rel.stored_with = copy.copy(out_stored_with)
+                    par.out_rel.stored_with = out_stored_with
             node.is_mpc = False
 
     def _rewrite_concat_cols(self, node: ccdag.ConcatCols):
@@ -527,10 +602,14 @@ class UpdateColumns(DagRewriter):
         super(UpdateColumns, self).__init__(conclave_config)
 
     def rewrite(self, dag: ccdag.OpDag):
-        ordered = dag.top_sort()
+        ordered = dag.cached_top_sort()
+        visited = [] if logger.isEnabledFor(logging.DEBUG) else None
         for node in ordered:
-            print(type(self).__name__, "rewriting", node.out_rel.name)
+            if visited is not None:
+                visited.append(node.out_rel.name)
             node.update_op_specific_cols()
+        if visited is not None:
+            logger.debug("%s rewrote %s", type(self).__name__, ", ".join(visited))
 
 
 class TrustSetPropDown(DagRewriter):
@@ -555,13 +634,13 @@ class TrustSetPropDown(DagRewriter):
         target_col_out = out_rel_cols[target_col.idx]
 
         # Need all operands to derive target column
-        target_col_out.trust_set = copy.copy(utils.trust_set_from_columns(operands))
+        target_col_out.trust_set = utils.trust_set_from_columns(operands)
 
         # The other columns weren't modified so their trust sets simply carry over
         # Skip target column (which comes first)
         zipped = zip(node.get_in_rel().columns[1:], out_rel_cols[1:])
         for in_col, out_col in zipped:
-            out_col.trust_set = copy.copy(in_col.trust_set)
+            out_col.trust_set = in_col.trust_set
 
     def _rewrite_aggregate(self, node: [ccdag.Aggregate, ccdag.IndexAggregate]):
         """
@@ -579,17 +658,17 @@ class TrustSetPropDown(DagRewriter):
         in_group_cols = node.group_cols
         out_group_cols = node.out_rel.columns[:-1]
         in_group_cols_ts = utils.trust_set_from_columns(in_group_cols)
-        for i in range(len(out_group_cols)):
-            out_group_cols[i].trust_set = copy.copy(in_group_cols_ts)
+        for out_group_col in out_group_cols:
+            out_group_col.trust_set = in_group_cols_ts
         if node.aggregator == "sum" or node.aggregator == "mean" or node.aggregator == "std_dev":
-            in_agg_col_ts = copy.copy(node.agg_col.trust_set)
+            in_agg_col_ts = node.agg_col.trust_set
         elif node.aggregator == "count":
             # in case of a count, result over col has same trust set as group by cols
             in_agg_col_ts = in_group_cols_ts
         else:
             raise Exception("Unknown aggregator {}".format(node.aggregator))
         out_agg_col = node.out_rel.columns[-1]
-        out_agg_col.trust_set = copy.copy(utils.merge_coll_sets(in_agg_col_ts, in_group_cols_ts))
+        out_agg_col.trust_set = utils.merge_coll_sets(in_agg_col_ts, in_group_cols_ts)
 
     def _rewrite_divide(self, node: ccdag.Divide):
         """
@@ -623,7 +702,7 @@ class TrustSetPropDown(DagRewriter):
         selected_cols = node.selected_cols
 
         for in_col, out_col in zip(selected_cols, node.out_rel.columns):
-            out_col.trust_set = copy.copy(in_col.trust_set)
+            out_col.trust_set = in_col.trust_set
 
     def _rewrite_filter(self, node: ccdag.Filter):
         """
@@ -724,19 +803,21 @@ class TrustSetPropDown(DagRewriter):
                 left_join_cols[i].trust_set, right_join_cols[i].trust_set))
             out_join_cols[i].trust_set = key_cols_coll_sets[i]
 
+        # non-key columns are only revealed alongside all key columns
+        all_keys_ts = functools.reduce(utils.merge_coll_sets, key_cols_coll_sets)
+
+        left_key_set = set(left_join_cols)
+        right_key_set = set(right_join_cols)
+
         abs_idx = len(left_join_cols)
         for in_col in left_in_rel.columns:
-            if in_col not in set(left_join_cols):
-                for key_col_coll_sets in key_cols_coll_sets:
-                    node.out_rel.columns[abs_idx].trust_set = \
-                        utils.merge_coll_sets(key_col_coll_sets, in_col.trust_set)
+            if in_col not in left_key_set:
+                node.out_rel.columns[abs_idx].trust_set = utils.merge_coll_sets(all_keys_ts, in_col.trust_set)
                 abs_idx += 1
 
         for in_col in right_in_rel.columns:
-            if in_col not in set(right_join_cols):
-                for key_col_coll_sets in key_cols_coll_sets:
-                    node.out_rel.columns[abs_idx].trust_set = \
-                        utils.merge_coll_sets(key_col_coll_sets, in_col.trust_set)
+            if in_col not in right_key_set:
+                node.out_rel.columns[abs_idx].trust_set = utils.merge_coll_sets(all_keys_ts, in_col.trust_set)
                 abs_idx += 1
 
     def _rewrite_union(self, node: ccdag.Union):
@@ -769,7 +850,7 @@ class TrustSetPropDown(DagRewriter):
         """
         # TODO make more robust by wrapping two sides of intersect into single operator
         # This works because we can only run a PubIntersect on a public col
-        node.out_rel.columns[0].trust_set = copy.deepcopy(node.col.trust_set)
+        node.out_rel.columns[0].trust_set = node.col.trust_set
 
     def _rewrite_concat(self, node: ccdag.Concat):
         """
@@ -790,18 +871,21 @@ class TrustSetPropDown(DagRewriter):
         # Copy over columns from existing relation
         out_rel_cols = node.out_rel.columns
 
-        # Combine per-column collusion sets
-        for idx, col in enumerate(out_rel_cols):
-            columns_at_idx = [in_rel.columns[idx] for in_rel in node.get_in_rels()]
+        # Combine per-column collusion sets, walking the input relations' columns in lockstep
+        in_rels_cols = [in_rel.columns for in_rel in node.get_in_rels()]
+        for col, columns_at_idx in zip(out_rel_cols, zip(*in_rels_cols)):
             col.trust_set = utils.trust_set_from_columns(columns_at_idx)
 
 
 class HybridOperatorOpt(DagRewriter):
     """ DagRewriter subclass specific to hybrid operator optimization rewriting. """
 
+    rewrite_types = (ccdag.Aggregate, ccdag.Join)
+
     def __init__(self, conclave_config: cc_conf.CodeGenConfig):
 
         super(HybridOperatorOpt, self).__init__(conclave_config)
+        self.all_pids_trust_set = utils.set_to_trust_set(conclave_config.all_pids)
 
     def _rewrite_aggregate(self, node: ccdag.Aggregate):
         """ Convert Aggregate node to HybridAggregate node. """
@@ -814,7 +898,7 @@ class HybridOperatorOpt(DagRewriter):
             if trust_set:
                 # hybrid agg possible
                 # oversimplifying here. what if there are multiple STPs?
-                STP = sorted(trust_set)[0]
+                STP = utils.min_party(trust_set)
                 hybrid_agg_op = ccdag.HybridAggregate.from_aggregate(node, STP)
                 parents = hybrid_agg_op.parents
                 for par in parents:
@@ -843,7 +927,7 @@ class HybridOperatorOpt(DagRewriter):
             if trust_set:
                 # for now only support 2-party public join
                 in_stored_with = node.get_left_in_rel().stored_with | node.get_right_in_rel().stored_with
-                if trust_set == set(self.conclave_config.all_pids) and len(in_stored_with) == 2:
+                if trust_set == self.all_pids_trust_set and len(in_stored_with) == 2:
                     # public join possible
                     public_join_op = ccdag.PublicJoin.from_join(node)
                     parents = public_join_op.parents
@@ -856,7 +940,7 @@ class HybridOperatorOpt(DagRewriter):
                 else:
                     # hybrid join possible
                     # oversimplifying here. what if there are multiple STPs?
-                    STP = sorted(trust_set)[0]
+                    STP = utils.min_party(trust_set)
                     hybrid_join_op = ccdag.HybridJoin.from_join(node, STP)
                     parents = hybrid_join_op.parents
                     for par in parents:
@@ -884,17 +968,16 @@ class InsertOpenAndCloseOps(DagRewriter):
         warnings.warn("hacky insert store ops")
         in_stored_with = node.get_in_rel().stored_with
         out_stored_with = node.out_rel.stored_with
-        print(node.is_mpc)
-        print(node.children)
+        logger.debug("%s is_mpc: %s, children: %s", node.out_rel.name, node.is_mpc, node.children)
         if in_stored_with != out_stored_with:
             if node.is_lower_boundary():
                 # input is stored with one set of parties
                 # but output must be stored with another so we
                 # need an open operation
-                out_rel = copy.deepcopy(node.out_rel)
+                out_rel = node.out_rel.clone()
                 out_rel.rename(out_rel.name + "_open")
                 # reset stored_with on parent so input matches output
-                node.out_rel.stored_with = copy.copy(in_stored_with)
+                node.out_rel.stored_with = in_stored_with
 
                 # create and insert store node
                 store_op = ccdag.Open(out_rel, None)
@@ -940,6 +1023,17 @@ class InsertOpenAndCloseOps(DagRewriter):
 
         self._rewrite_join(node)
 
+    @staticmethod
+    def _insert_close(parent: ccdag.OpNode, node: ccdag.OpNode, stored_with: set):
+        """ Insert a Close op between parent and node that secret-shares the parent's output among stored_with. """
+        out_rel = parent.out_rel.clone()
+        out_rel.rename(out_rel.name + "_close")
+        out_rel.stored_with = stored_with
+        # create and insert close node
+        close_op = ccdag.Close(out_rel, None)
+        close_op.is_mpc = True
+        ccdag.insert_between(parent, node, close_op)
+
     def _rewrite_join(self, node: ccdag.Join):
         """
         Insert Open/Close ops above or beneath a Join node. If the parent of the Join node is an upper
@@ -948,26 +1042,25 @@ class InsertOpenAndCloseOps(DagRewriter):
         """
 
         out_stored_with = node.out_rel.stored_with
-        ordered_pars = [node.left_parent, node.right_parent]
+        left_parent = node.left_parent
+        right_parent = node.right_parent
 
         left_stored_with = node.get_left_in_rel().stored_with
         right_stored_with = node.get_right_in_rel().stored_with
         in_stored_with = left_stored_with | right_stored_with
 
-        for parent in ordered_pars:
-            if not parent.is_mpc and not isinstance(parent, ccdag.Close) and node.is_mpc:
-                # Entering mpc mode so need to secret-share before op
-                out_rel = copy.deepcopy(parent.out_rel)
-                out_rel.rename(out_rel.name + "_close")
-                out_rel.stored_with = copy.copy(in_stored_with)
-                # create and insert close node
-                close_op = ccdag.Close(out_rel, None)
-                close_op.is_mpc = True
-                ccdag.insert_between(parent, node, close_op)
+        # Entering mpc mode so need to secret-share non-mpc inputs before op
+        insert_left = node.is_mpc and not left_parent.is_mpc and not isinstance(left_parent, ccdag.Close)
+        insert_right = node.is_mpc and not right_parent.is_mpc and not isinstance(right_parent, ccdag.Close)
+        if insert_left:
+            self._insert_close(left_parent, node, in_stored_with)
+        if insert_right:
+            self._insert_close(right_parent, node, in_stored_with)
+
         if node.is_leaf():
             if len(in_stored_with) > 1 and len(out_stored_with) == 1:
                 target_party = next(iter(out_stored_with))
-                node.out_rel.stored_with = copy.copy(in_stored_with)
+                node.out_rel.stored_with = in_stored_with
                 cc._open(node, node.out_rel.name + "_open", target_party)
 
     def _rewrite_concat(self, node: ccdag.Concat):
@@ -981,9 +1074,9 @@ class InsertOpenAndCloseOps(DagRewriter):
             for parent in ordered_pars:
                 par_stored_with = parent.out_rel.stored_with
                 if par_stored_with != out_stored_with:
-                    out_rel = copy.deepcopy(parent.out_rel)
+                    out_rel = parent.out_rel.clone()
                     out_rel.rename(out_rel.name + "_close")
-                    out_rel.stored_with = copy.copy(out_stored_with)
+                    out_rel.stored_with = out_stored_with
                     # create and insert close node
                     store_op = ccdag.Close(out_rel, None)
                     store_op.is_mpc = True
@@ -993,24 +1086,22 @@ class InsertOpenAndCloseOps(DagRewriter):
         # TODO this is a mess...
         out_stored_with = node.out_rel.stored_with
         ordered_pars = node.get_sorted_parents()
-        in_stored_with = set()
-        for parent in ordered_pars:
-            par_stored_with = parent.out_rel.stored_with
-            in_stored_with |= par_stored_with
-        for parent in ordered_pars:
-            if not isinstance(parent, ccdag.Close):
-                out_rel = copy.deepcopy(parent.out_rel)
-                out_rel.rename(out_rel.name + "_close")
-                out_rel.stored_with = copy.copy(in_stored_with)
-                # create and insert close node
-                store_op = ccdag.Close(out_rel, None)
-                store_op.is_mpc = True
-                ccdag.insert_between(parent, node, store_op)
+        in_stored_with = frozenset().union(*[parent.out_rel.stored_with for parent in ordered_pars])
+        # parents that are already Close ops need nothing inserted
+        pars_to_close = [parent for parent in ordered_pars if not isinstance(parent, ccdag.Close)]
+        for parent in pars_to_close:
+            out_rel = parent.out_rel.clone()
+            out_rel.rename(out_rel.name + "_close")
+            out_rel.stored_with = in_stored_with
+            # create and insert close node
+            store_op = ccdag.Close(out_rel, None)
+            store_op.is_mpc = True
+            ccdag.insert_between(parent, node, store_op)
 
         if node.is_leaf():
             if len(in_stored_with) > 1 and len(out_stored_with) == 1:
                 target_party = next(iter(out_stored_with))
-                node.out_rel.stored_with = copy.copy(in_stored_with)
+                node.out_rel.stored_with = in_stored_with
                 cc._open(node, node.out_rel.name + "_open", target_party)
 
     def _rewrite_sort_by(self, node: ccdag.SortBy):
@@ -1027,6 +1118,7 @@ class ExpandCompositeOps(DagRewriter):
         super(ExpandCompositeOps, self).__init__(conclave_config)
 
         self.use_leaky_ops = conclave_config.use_leaky_ops
+        self.all_pids = frozenset(conclave_config.all_pids)
         self.join_counter = 0
         self.public_join_counter = 0
         self.agg_counter = 0
@@ -1070,6 +1162,8 @@ class ExpandCompositeOps(DagRewriter):
         """
         suffix = self._create_unique_agg_suffix()
         group_by_col_name = node.group_cols[0].name
+        in_stored_with = node.get_in_rel().stored_with
+        trusted_party = node.trusted_party
 
         shuffled = cc.shuffle(node.parent, "shuffled" + suffix)
         shuffled.is_mpc = True
@@ -1081,7 +1175,7 @@ class ExpandCompositeOps(DagRewriter):
         keys_closed = cc.project(shuffled, "keys_closed" + suffix, [group_by_col_name])
         keys_closed.is_mpc = True
 
-        keys = cc._open(keys_closed, "keys" + suffix, node.trusted_party)
+        keys = cc._open(keys_closed, "keys" + suffix, trusted_party)
         keys.is_mpc = True
 
         indexed = cc.index(keys, "indexed" + suffix, "row_index")
@@ -1093,16 +1187,17 @@ class ExpandCompositeOps(DagRewriter):
         eq_flags = cc._comp_neighs(sorted_by_key, "eq_flags" + suffix, group_by_col_name)
         eq_flags.is_mpc = False
 
-        # TODO check if we can use a persist here
+        # Local jobs only write out their leaf relations, and sorted_by_key also feeds eq_flags in the same job,
+        # so this identity projection is the leaf that hands the sorted keys to the MPC job. It must not be
+        # collapsed into sorted_by_key.
         sorted_by_key_dummy = cc.project(sorted_by_key, "sorted_by_key_dummy" + suffix,
                                          ["row_index", group_by_col_name])
         sorted_by_key_dummy.is_mpc = False
 
-        closed_eq_flags = cc._close(eq_flags, "closed_eq_flags" + suffix, node.get_in_rel().stored_with)
+        closed_eq_flags = cc._close(eq_flags, "closed_eq_flags" + suffix, in_stored_with)
         closed_eq_flags.is_mpc = True
 
-        closed_sorted_by_key = cc._close(sorted_by_key_dummy, "closed_sorted_by_key" + suffix,
-                                         node.get_in_rel().stored_with)
+        closed_sorted_by_key = cc._close(sorted_by_key_dummy, "closed_sorted_by_key" + suffix, in_stored_with)
         closed_sorted_by_key.is_mpc = True
 
         group_col_names = [col.name for col in node.group_cols]
@@ -1113,10 +1208,7 @@ class ExpandCompositeOps(DagRewriter):
                                     closed_sorted_by_key)
         result.is_mpc = True
         # replace self with leaf of expanded subdag in each child node
-        for child in node.get_sorted_children():
-            child.replace_parent(node, result)
-        # add former children to children of leaf
-        result.children = node.children
+        result.take_children(node)
 
     def _rewrite_hybrid_aggregate(self, node: ccdag.HybridAggregate):
         # TODO cleaner way would be to have a LeakyHybridAggregate class
@@ -1130,7 +1222,11 @@ class ExpandCompositeOps(DagRewriter):
         Expand hybrid join into a sub-dag of primitive operators. This uses the size-leaking version.
         """
         suffix = self._create_unique_join_suffix()
+        all_pids = self.all_pids
+        trusted_party = node.trusted_party
         # TODO column names should not be hard-coded
+        left_key_names = ["a"]
+        right_key_names = ["c"]
 
         # Under MPC
         # in left parents' children, replace self with first primitive operator in expanded sub-dag
@@ -1149,16 +1245,16 @@ class ExpandCompositeOps(DagRewriter):
         right_persisted = cc._persist(right_shuffled, "right_persisted" + suffix)
         right_persisted.is_mpc = True
 
-        left_keys_closed = cc.project(left_shuffled, "left_keys_closed" + suffix, ["a"])
+        left_keys_closed = cc.project(left_shuffled, "left_keys_closed" + suffix, left_key_names)
         left_keys_closed.is_mpc = True
 
-        right_keys_closed = cc.project(right_shuffled, "right_keys_closed" + suffix, ["c"])
+        right_keys_closed = cc.project(right_shuffled, "right_keys_closed" + suffix, right_key_names)
         right_keys_closed.is_mpc = True
 
-        left_keys_open = cc._open(left_keys_closed, "left_keys_open" + suffix, node.trusted_party)
+        left_keys_open = cc._open(left_keys_closed, "left_keys_open" + suffix, trusted_party)
         left_keys_open.is_mpc = True
 
-        right_keys_open = cc._open(right_keys_closed, "right_keys_open" + suffix, node.trusted_party)
+        right_keys_open = cc._open(right_keys_closed, "right_keys_open" + suffix, trusted_party)
         right_keys_open.is_mpc = True
 
         # At STP
@@ -1170,7 +1266,8 @@ class ExpandCompositeOps(DagRewriter):
         right_indexed.is_mpc = False
         # right_indexed_pers = cc._persist(right_indexed, "right_indexed" + suffix)
 
-        joined_indexes = cc.join(left_indexed, right_indexed, "joined_indexes" + suffix, ["a"], ["c"])
+        joined_indexes = cc.join(left_indexed, right_indexed, "joined_indexes" + suffix,
+                                 left_key_names, right_key_names)
         joined_indexes.is_mpc = False
 
         indexes_left = cc.project(joined_indexes, "indexes_left" + suffix, ["lidx"])
@@ -1195,44 +1292,44 @@ class ExpandCompositeOps(DagRewriter):
                                              "right_encoded" + suffix)
         right_encoded.is_mpc = False
 
-        num_lookups_closed = cc._close(num_lookups, "num_lookups_closed" + suffix, set(self.conclave_config.all_pids))
+        num_lookups_closed = cc._close(num_lookups, "num_lookups_closed" + suffix, all_pids)
         num_lookups_closed.is_mpc = True
 
         left_unpermuted_closed = \
-            cc._close(left_unpermuted_idx, "left_unpermuted_closed" + suffix, set(self.conclave_config.all_pids))
+            cc._close(left_unpermuted_idx, "left_unpermuted_closed" + suffix, all_pids)
         left_unpermuted_closed.is_mpc = True
         left_unpermuted_pers = cc._persist(left_unpermuted_closed, "left_unpermuted_closed" + suffix)
         right_unpermuted_closed = \
-            cc._close(right_unpermuted_idx, "right_unpermuted_closed" + suffix, set(self.conclave_config.all_pids))
+            cc._close(right_unpermuted_idx, "right_unpermuted_closed" + suffix, all_pids)
         right_unpermuted_closed.is_mpc = True
         right_unpermuted_pers = cc._persist(right_unpermuted_closed, "right_unpermuted_closed" + suffix)
 
         left_encoded_closed = \
-            cc._close(left_encoded, "left_encoded_closed" + suffix, set(self.conclave_config.all_pids))
+            cc._close(left_encoded, "left_encoded_closed" + suffix, all_pids)
         left_encoded_closed.is_mpc = True
         right_encoded_closed = \
-            cc._close(right_encoded, "right_encoded_closed" + suffix, set(self.conclave_config.all_pids))
+            cc._close(right_encoded, "right_encoded_closed" + suffix, all_pids)
         right_encoded_closed.is_mpc = True
 
         # TODO update operator name and arguments
         left_flags_and_indexes_closed = cc._flag_join(left_persisted, left_encoded_closed,
                                                       "left_flags_and_indexes_closed" + suffix,
-                                                      ["a"], ["c"],
+                                                      left_key_names, right_key_names,
                                                       num_lookups_closed)
         left_flags_and_indexes_closed.is_mpc = True
 
         left_flags_and_indexes = cc._open(left_flags_and_indexes_closed, "left_flags_and_indexes" + suffix,
-                                          node.trusted_party)
+                                          trusted_party)
         left_flags_and_indexes.is_mpc = True
 
         right_flags_and_indexes_closed = cc._flag_join(right_persisted, right_encoded_closed,
                                                        "right_flags_and_indexes_closed" + suffix,
-                                                       ["a"], ["c"],
+                                                       left_key_names, right_key_names,
                                                        num_lookups_closed)
         right_flags_and_indexes_closed.is_mpc = True
 
         right_flags_and_indexes = cc._open(right_flags_and_indexes_closed, "right_flags_and_indexes" + suffix,
-                                           node.trusted_party)
+                                           trusted_party)
         right_flags_and_indexes.is_mpc = True
 
         # Back at STP
@@ -1245,11 +1342,11 @@ class ExpandCompositeOps(DagRewriter):
         right_arranged.is_mpc = False
 
         left_arranged_closed = \
-            cc._close(left_arranged, "left_arranged_closed" + suffix, set(self.conclave_config.all_pids))
+            cc._close(left_arranged, "left_arranged_closed" + suffix, all_pids)
         left_arranged_closed.is_mpc = True
 
         right_arranged_closed = \
-            cc._close(right_arranged, "right_arranged_closed" + suffix, set(self.conclave_config.all_pids))
+            cc._close(right_arranged, "right_arranged_closed" + suffix, all_pids)
         right_arranged_closed.is_mpc = True
 
         # Final MPC step
@@ -1285,10 +1382,7 @@ class ExpandCompositeOps(DagRewriter):
         joined.is_mpc = True
 
         # replace self with leaf of expanded subdag in each child node
-        for child in node.get_sorted_children():
-            child.replace_parent(node, joined)
-        # add former children to children of leaf
-        joined.children = node.children
+        joined.take_children(node)
 
     def _rewrite_hybrid_join(self, node: ccdag.HybridJoin):
         if self.use_leaky_ops:
@@ -1299,6 +1393,7 @@ class ExpandCompositeOps(DagRewriter):
     def _rewrite_public_join(self, node: ccdag.PublicJoin):
 
         suffix = self._create_unique_public_join_suffix()
+        all_pids = self.all_pids
 
         left_parent = node.left_parent
         right_parent = node.right_parent
@@ -1333,18 +1428,15 @@ class ExpandCompositeOps(DagRewriter):
         node.left_parent.children.remove(node)
         node.right_parent.children.remove(node)
 
-        left_join_closed = cc._close(left_join, "left_join_closed" + suffix, set(self.conclave_config.all_pids))
+        left_join_closed = cc._close(left_join, "left_join_closed" + suffix, all_pids)
         left_join_closed.is_mpc = True
-        right_join_closed = cc._close(right_join, "right_join_closed" + suffix, set(self.conclave_config.all_pids))
+        right_join_closed = cc._close(right_join, "right_join_closed" + suffix, all_pids)
         right_join_closed.is_mpc = True
 
         joined = cc.concat_cols([left_join_closed, right_join_closed], node.out_rel.name, use_mult=True)
         joined.is_mpc = True
         # replace self with leaf of expanded subdag in each child node
-        for child in node.get_sorted_children():
-            child.replace_parent(node, joined)
-        # add former children to children of leaf
-        joined.children = node.children
+        joined.take_children(node)
 
 
 class StoredWithSimplifier(DagRewriter):
@@ -1355,17 +1447,12 @@ class StoredWithSimplifier(DagRewriter):
 
     def __init__(self, conclave_config: cc_conf.CodeGenConfig):
         super(StoredWithSimplifier, self).__init__(conclave_config)
+        self.all_pids = frozenset(conclave_config.all_pids)
 
-    def rewrite(self, dag: ccdag.OpDag):
-        """ Traverse topologically sorted DAG, inspect each node. """
-        ordered = dag.top_sort()
-        if self.reverse:
-            ordered = ordered[::-1]
-
-        for node in ordered:
-            print(type(self).__name__, "rewriting", node.out_rel.name)
-            if len(node.out_rel.stored_with) > 1:
-                node.out_rel.stored_with = set(self.conclave_config.all_pids)
+    def rewrite_node(self, node: ccdag.OpNode):
+        """ Applies to every node regardless of operator type. """
+        if len(node.out_rel.stored_with) > 1:
+            node.out_rel.stored_with = self.all_pids
 
 
 class EliminateSorts(DagRewriter):
@@ -1416,17 +1503,60 @@ class EliminateSorts(DagRewriter):
             self.sorted_by = None
 
 
+class FusedRewriter:
+    """
+    Runs several rewrite passes in a single traversal of the DAG, applying each pass to a node before moving on to
+    the next node. This is only equivalent to running the passes one after another if they visit nodes in the same
+    order and if each pass's handling of a node depends only on that node and the nodes visited before it.
+    """
+
+    def __init__(self, *rewriters: DagRewriter):
+        assert len({rewriter.reverse for rewriter in rewriters}) == 1
+        self.rewriters = rewriters
+
+    def rewrite(self, dag: ccdag.OpDag):
+        """ Traverse topologically sorted DAG, applying every pass to each node. """
+        ordered = dag.cached_top_sort(self.rewriters[0].reverse)
+
+        visited = [] if logger.isEnabledFor(logging.DEBUG) else None
+        for node in ordered:
+            if visited is not None:
+                visited.append(node.out_rel.name)
+            for rewriter in self.rewriters:
+                if rewriter.rewrite_types is None or isinstance(node, rewriter.rewrite_types):
+                    rewriter.rewrite_node(node)
+        if visited is not None:
+            logger.debug("%s rewrote %s", " + ".join(type(rewriter).__name__ for rewriter in self.rewriters),
+                         ", ".join(visited))
+
+
+def warn_duplicate_outputs(dag: ccdag.OpDag):
+    """ Warns about leaf relations that share a name, since their outputs would overwrite each other. """
+    seen = set()
+    for node in dag.cached_top_sort():
+        if node.is_leaf():
+            name = node.out_rel.name
+            if name in seen:
+                warnings.warn("multiple outputs named " + name)
+            seen.add(name)
+
+
 def rewrite_dag(dag: ccdag.OpDag, conclave_config: cc_conf.CodeGenConfig):
     """ Combines and calls all rewrite operations. """
+    warn_duplicate_outputs(dag)
+    FuseProjections(conclave_config).rewrite(dag)
     MPCPushDown(conclave_config).rewrite(dag)
-    UpdateColumns(conclave_config).rewrite(dag)
+    # MPCPushUp also updates operator specific columns, covering UpdateColumns
     MPCPushUp(conclave_config).rewrite(dag)
-    TrustSetPropDown(conclave_config).rewrite(dag)
-    HybridOperatorOpt(conclave_config).rewrite(dag)
+    # hybrid operator selection only looks at a node's own trust sets, which are final once it has been visited
+    FusedRewriter(TrustSetPropDown(conclave_config), HybridOperatorOpt(conclave_config)).rewrite(dag)
+    # only the leaky expansions of hybrid operators exist, so fail before inserting open and close ops
+    if not conclave_config.use_leaky_ops and dag.nodes_of_type((ccdag.HybridAggregate, ccdag.HybridJoin)):
+        raise Exception("not implemented")
     InsertOpenAndCloseOps(conclave_config).rewrite(dag)
     ExpandCompositeOps(conclave_config).rewrite(dag)
-    StoredWithSimplifier(conclave_config).rewrite(dag)
-    EliminateSorts(conclave_config).rewrite(dag)
+    # EliminateSorts doesn't read stored_with sets
+    FusedRewriter(StoredWithSimplifier(conclave_config), EliminateSorts(conclave_config)).rewrite(dag)
     return dag
 
 
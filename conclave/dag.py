@@ -2,21 +2,134 @@
 Data structure for representing a workflow directed acyclic graph (DAG).
 """
 import copy
+import itertools
 
 from conclave import rel
 
+# Set to a fresh value whenever the parents or children of any node change,
+# so that cached traversal orders can tell when they are stale. It is shared
+# by all DAGs, so an edit to one DAG merely makes the others recompute their
+# ordering once. Bumps never reuse a value, so a cached ordering is only
+# trusted if no edge changed since it was computed; compiling independent
+# DAGs in separate threads or processes is safe as long as each DAG is only
+# used by one of them.
+_structure_version = 0
+# next() on a count is atomic, so every bump stores a value no cache has seen
+_version_counter = itertools.count(1)
+
+
+def _bump_structure_version():
+    """ Record that some edge in some DAG was added or removed. """
+    global _structure_version
+    _structure_version = next(_version_counter)
+
+
+class _NeighbourSet(set):
+    """
+    Set of a node's parents or children that clears the node's cached sorted
+    view of that set, and bumps the structure version, whenever it is modified.
+    """
+
+    def __init__(self, iterable=(), owner=None, cache_attr=None):
+        """ Initialize set with the node that owns it and the name of the cache to clear. """
+        super(_NeighbourSet, self).__init__(iterable)
+        self.owner = owner
+        self.cache_attr = cache_attr
+
+    def _invalidate(self):
+        """ Drop the owner's cached sorted view. """
+        _bump_structure_version()
+        if self.owner is not None:
+            setattr(self.owner, self.cache_attr, None)
+
+    def add(self, elem):
+        self._invalidate()
+        super(_NeighbourSet, self).add(elem)
+
+    def remove(self, elem):
+        self._invalidate()
+        super(_NeighbourSet, self).remove(elem)
+
+    def discard(self, elem):
+        self._invalidate()
+        super(_NeighbourSet, self).discard(elem)
+
+    def pop(self):
+        self._invalidate()
+        return super(_NeighbourSet, self).pop()
+
+    def clear(self):
+        self._invalidate()
+        super(_NeighbourSet, self).clear()
+
+    def update(self, *others):
+        self._invalidate()
+        super(_NeighbourSet, self).update(*others)
+
+    def difference_update(self, *others):
+        self._invalidate()
+        super(_NeighbourSet, self).difference_update(*others)
+
+    def intersection_update(self, *others):
+        self._invalidate()
+        super(_NeighbourSet, self).intersection_update(*others)
+
+    def symmetric_difference_update(self, other):
+        self._invalidate()
+        super(_NeighbourSet, self).symmetric_difference_update(other)
+
+    def __ior__(self, other):
+        self._invalidate()
+        return super(_NeighbourSet, self).__ior__(other)
+
+    def __iand__(self, other):
+        self._invalidate()
+        return super(_NeighbourSet, self).__iand__(other)
+
+    def __isub__(self, other):
+        self._invalidate()
+        return super(_NeighbourSet, self).__isub__(other)
+
+    def __ixor__(self, other):
+        self._invalidate()
+        return super(_NeighbourSet, self).__ixor__(other)
+
 
 class Node:
     """
     Graph node data structure.
     """
 
+    __slots__ = ("name", "_children", "_parents", "_sorted_children", "_sorted_parents")
+
     def __init__(self, name: str):
         """ Initalize graph node object. """
         self.name = name
         self.children = set()
         self.parents = set()
 
+    @property
+    def children(self):
+        """ Set of this node's child nodes. """
+        return self._children
+
+    @children.setter
+    def children(self, nodes):
+        _bump_structure_version()
+        self._sorted_children = None
+        self._children = _NeighbourSet(nodes, self, "_sorted_children")
+
+    @property
+    def parents(self):
+        """ Set of this node's parent nodes. """
+        return self._parents
+
+    @parents.setter
+    def parents(self, nodes):
+        _bump_structure_version()
+        self._sorted_parents = None
+        self._parents = _NeighbourSet(nodes, self, "_sorted_parents")
+
     def debug_str(self):
         """ Return extended string representation for debugging. """
         children_str = str([n.name for n in self.children])
@@ -41,6 +154,9 @@ class OpNode(Node):
     Base class for nodes that store relational operations
     """
 
+    # subclasses declare slots for their own operator specific attributes
+    __slots__ = ("out_rel", "is_local", "is_mpc", "skip")
+
     def __init__(self, name: str, out_rel: rel.Relation):
         """ Initialize OpNode object. """
         super(OpNode, self).__init__(name)
@@ -60,11 +176,11 @@ class OpNode(Node):
 
     def is_upper_boundary(self):
         """ Returns whether this node is MPC and is at the start of an MPC job. """
-        return self.is_mpc and not any([par.is_mpc and not isinstance(par, Close) for par in self.parents])
+        return self.is_mpc and not any(par.is_mpc and not isinstance(par, Close) for par in self.parents)
 
     def is_lower_boundary(self):
         """ Returns whether this node is MPC and is at the end of an MPC job. """
-        return self.is_mpc and not any([child.is_mpc and not isinstance(child, Open) for child in self.children])
+        return self.is_mpc and not any(child.is_mpc and not isinstance(child, Open) for child in self.children)
 
     def is_reversible(self):
         """
@@ -112,13 +228,45 @@ class OpNode(Node):
         self.children.remove(old_child)
         self.children.add(new_child)
 
+    def take_children(self, other: 'OpNode'):
+        """
+        Replace other with this node as the parent of each of other's children, and make them this node's children.
+        The children are unchanged, so other's sorted view of them is reused rather than recomputed.
+        """
+        sorted_children = other.get_sorted_children()
+        for child in sorted_children:
+            child.replace_parent(other, self)
+        self.children = other.children
+        self._sorted_children = sorted_children
+
+    def clone_detached(self):
+        """
+        Return a copy of this node that has its own output relation and no parents or children. Operator specific
+        attributes (e.g. group_cols) are shared with this node until they are updated against the clone's new parent.
+        """
+        clone = copy.copy(self)
+        clone.out_rel = self.out_rel.clone()
+        clone.parents = set()
+        clone.children = set()
+        return clone
+
     def get_sorted_children(self):
-        """ Return a list of this node's child nodes in alphabetical order. """
-        return sorted(list(self.children), key=lambda x: x.out_rel.name)
+        """
+        Return a list of this node's child nodes in alphabetical order. The list is cached until the children
+        change and must not be modified by the caller.
+        """
+        if self._sorted_children is None:
+            self._sorted_children = sorted(self.children, key=lambda x: x.out_rel.name)
+        return self._sorted_children
 
     def get_sorted_parents(self):
-        """ Return a list of this node's parent nodes in alphabetical order. """
-        return sorted(list(self.parents), key=lambda x: x.out_rel.name)
+        """
+        Return a list of this node's parent nodes in alphabetical order. The list is cached until the parents
+        change and must not be modified by the caller.
+        """
+        if self._sorted_parents is None:
+            self._sorted_parents = sorted(self.parents, key=lambda x: x.out_rel.name)
+        return self._sorted_parents
 
     def __str__(self):
         """ Return a string representation of this node and whether it requires MPC. """
@@ -132,6 +280,8 @@ class OpNode(Node):
 class UnaryOpNode(OpNode):
     """ An OpNode with exactly one parent (e.g. - Multiply, Project, etc.). """
 
+    __slots__ = ("parent",)
+
     def __init__(self, name: str, out_rel: rel.Relation, parent: OpNode):
         """ Initialize UnaryOpNode object. """
         super(UnaryOpNode, self).__init__(name, out_rel)
@@ -149,7 +299,7 @@ class UnaryOpNode(OpNode):
 
     def update_stored_with(self):
         """ Returns the set of parties who store the data in this operation locally. """
-        self.out_rel.stored_with = copy.copy(self.get_in_rel().stored_with)
+        self.out_rel.stored_with = self.get_in_rel().stored_with
 
     def make_orphan(self):
         """ Remove the link between the node and it's parent node. """
@@ -170,6 +320,8 @@ class UnaryOpNode(OpNode):
 class BinaryOpNode(OpNode):
     """ An OpNode with exactly two parents (e.g. - Join). """
 
+    __slots__ = ("left_parent", "right_parent")
+
     def __init__(self, name: str, out_rel: rel.Relation, left_parent: OpNode, right_parent: OpNode):
 
         super(BinaryOpNode, self).__init__(name, out_rel)
@@ -224,6 +376,8 @@ class BinaryOpNode(OpNode):
 class NaryOpNode(OpNode):
     """ An OpNode with arbitrarily many parents (e.g. - Concat)."""
 
+    __slots__ = ()
+
     def __init__(self, name: str, out_rel: rel.Relation, parents: set):
         """ Initialize NaryOpNode object. """
         super(NaryOpNode, self).__init__(name, out_rel)
@@ -251,6 +405,8 @@ class NaryOpNode(OpNode):
 class Create(UnaryOpNode):
     """ Object for creating datasets in a DAG. """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation):
         """ Initialize Create object. """
         super(Create, self).__init__("create", out_rel, None)
@@ -265,6 +421,8 @@ class Create(UnaryOpNode):
 class Store(UnaryOpNode):
     """ Object for storing data returned by a workflow. """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode):
         """ Initialize Store object. """
         super(Store, self).__init__("store", out_rel, parent)
@@ -280,6 +438,8 @@ class Store(UnaryOpNode):
 class Persist(UnaryOpNode):
     """ ??? """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode):
         super(Persist, self).__init__("persist", out_rel, parent)
 
@@ -290,6 +450,8 @@ class Persist(UnaryOpNode):
 class Open(UnaryOpNode):
     """ Object for opening results of a computation to participating parties. """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, parent: [OpNode, None]):
         """ Initialize Open object. """
         super(Open, self).__init__("open", out_rel, parent)
@@ -303,6 +465,8 @@ class Open(UnaryOpNode):
 class Close(UnaryOpNode):
     """ Object for marking the boundary between local and MPC operations. """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, parent: [OpNode, None]):
         """ Initialize Close object. """
         super(Close, self).__init__("close", out_rel, parent)
@@ -316,6 +480,8 @@ class Close(UnaryOpNode):
 class Send(UnaryOpNode):
     """ Object for Sending secret shares to another party. """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode):
         """ Initialize Send object."""
         super(Send, self).__init__("send", out_rel, parent)
@@ -328,6 +494,8 @@ class Send(UnaryOpNode):
 class ConcatCols(NaryOpNode):
     """ Object to store the concatenation of several relations' columns. """
 
+    __slots__ = ("ordered", "use_mult")
+
     def __init__(self, out_rel: rel.Relation, parents: list, use_mult: bool):
         """ Initialize a ConcatCols object. """
         parent_set = set(parents)
@@ -361,6 +529,8 @@ class ConcatCols(NaryOpNode):
 class Concat(NaryOpNode):
     """ Object to store the concatenation of several relations' datasets. """
 
+    __slots__ = ("ordered",)
+
     def __init__(self, out_rel: rel.Relation, parents: list):
         """ Initialize a Concat object. """
         parent_set = set(parents)
@@ -400,6 +570,8 @@ class Concat(NaryOpNode):
 class Blackbox(NaryOpNode):
     """ Blackbox operator for backend-specific functionality """
 
+    __slots__ = ("ordered", "backend", "code")
+
     def __init__(self, out_rel: rel.Relation, parents: list, backend: str, code: str):
         """ Initialize a Blackbox object. """
         parent_set = set(parents)
@@ -412,6 +584,8 @@ class Blackbox(NaryOpNode):
 class Aggregate(UnaryOpNode):
     """ Object to store an aggregation over data. """
 
+    __slots__ = ("group_cols", "agg_col", "aggregator")
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode,
                  group_cols: list, agg_col: [rel.Column, None], aggregator: str):
         """ Initialize Aggregate object. """
@@ -431,10 +605,28 @@ class Aggregate(UnaryOpNode):
         if self.aggregator != "count":
             self.agg_col = self.get_in_rel().columns[self.agg_col.idx]
 
+    @classmethod
+    def make_oblivious_split(cls, agg_op: 'Aggregate'):
+        """
+        Generate the MPC half of a split aggregation: a detached MPC sum over the output of agg_op (which must
+        group by a single column), to be inserted below it.
+        """
+        out_rel = agg_op.out_rel.clone()
+        out_rel.rename(agg_op.out_rel.name + "_obl")
+        group_col = agg_op.out_rel.columns[0].clone()
+        group_col.idx = 0
+        over_col = agg_op.out_rel.columns[1].clone()
+        over_col.idx = 1
+        obj = cls(out_rel, None, [group_col], over_col, "sum")
+        obj.is_mpc = True
+        return obj
+
 
 class IndexAggregate(Aggregate):
     """ Object to store an indexed aggregation operation. """
 
+    __slots__ = ("eq_flag_op", "sorted_keys_op")
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, group_cols: list,
                  agg_col: rel.Column, aggregator: str, eq_flag_op: OpNode, sorted_keys_op: OpNode):
         """ Initialize IndexAggregate object. """
@@ -453,6 +645,8 @@ class IndexAggregate(Aggregate):
 class LeakyIndexAggregate(Aggregate):
     """ Object to store an leaky indexed aggregation operation. """
 
+    __slots__ = ("dist_keys", "keys_to_idx_map")
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, group_cols: list,
                  agg_col: rel.Column, aggregator: str, dist_keys: OpNode, keys_to_idx_map: OpNode):
         """ Initialize LeakyIndexAggregate object. """
@@ -471,6 +665,8 @@ class LeakyIndexAggregate(Aggregate):
 class Project(UnaryOpNode):
     """ Object to store a project operation. """
 
+    __slots__ = ("selected_cols",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, selected_cols: list):
         """ Initialize project object. """
         super(Project, self).__init__("project", out_rel, parent)
@@ -496,6 +692,8 @@ class Project(UnaryOpNode):
 class Index(UnaryOpNode):
     """ Add a column with row indeces to relation. """
 
+    __slots__ = ("idx_col_name",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, idx_col_name: str):
         """ Initialize Index object"""
         super(Index, self).__init__("index", out_rel, parent)
@@ -511,6 +709,8 @@ class Index(UnaryOpNode):
 class NumRows(UnaryOpNode):
     """ Output num rows of input to a relation. """
 
+    __slots__ = ("col_name",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, col_name: str):
         """ Initialize NumRows object"""
         super(NumRows, self).__init__("num_rows", out_rel, parent)
@@ -525,6 +725,8 @@ class NumRows(UnaryOpNode):
 class Shuffle(UnaryOpNode):
     """ Randomly permute rows of relation. """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode):
         """ Initialize Shuffle object. """
         super(Shuffle, self).__init__("shuffle", out_rel, parent)
@@ -538,6 +740,8 @@ class Shuffle(UnaryOpNode):
 class Multiply(UnaryOpNode):
     """ Object to store multiplication between columns. """
 
+    __slots__ = ("operands", "target_col")
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, target_col: rel.Column, operands: list):
         """ Initialize Multiply object. """
         super(Multiply, self).__init__("multiply", out_rel, parent)
@@ -563,6 +767,8 @@ class Multiply(UnaryOpNode):
 class Limit(UnaryOpNode):
     """ Object to store the limiting of resulting rows from a relation. """
 
+    __slots__ = ("num",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, num: int):
         super(Limit, self).__init__("limit", out_rel, parent)
         self.num = num
@@ -574,6 +780,8 @@ class Limit(UnaryOpNode):
 class SortBy(UnaryOpNode):
     """ Object to store the sorting of a relation over a particular column. """
 
+    __slots__ = ("sort_by_col",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, sort_by_col: rel.Column):
         """ Initialize SortBy object. """
         super(SortBy, self).__init__("sortBy", out_rel, parent)
@@ -592,6 +800,8 @@ class CompNeighs(UnaryOpNode):
     Used in Hybrid Aggregation to allow parties to obliviously aggregate during MPC.
     """
 
+    __slots__ = ("comp_col",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, comp_col: rel.Column):
         """ Initialize CompNeighs object. """
         super(CompNeighs, self).__init__("compNeighs", out_rel, parent)
@@ -610,6 +820,8 @@ class Distinct(UnaryOpNode):
     with respect to a set of selected columns.
     """
 
+    __slots__ = ("selected_cols",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, selected_cols: list):
         """ Initialize Distinct object. """
         super(Distinct, self).__init__("distinct", out_rel, parent)
@@ -627,6 +839,8 @@ class DistinctCount(UnaryOpNode):
     Distinct count operator.
     """
 
+    __slots__ = ("selected_col", "is_reversible", "use_sort")
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, selected_col: str):
         super(DistinctCount, self).__init__("distinct_count", out_rel, parent)
         self.selected_col = selected_col
@@ -641,6 +855,7 @@ class DistinctCount(UnaryOpNode):
 
 
 class Divide(UnaryOpNode):
+    __slots__ = ("operands", "target_col")
 
     def __init__(self, out_rel: rel.Relation, parent: OpNode, target_col: rel.Column, operands: list):
         super(Divide, self).__init__("divide", out_rel, parent)
@@ -663,6 +878,8 @@ class Filter(UnaryOpNode):
     Operator for filtering relations for rows with specified attribute values.
     """
 
+    __slots__ = ("is_scalar", "other_col", "scalar", "operator", "filter_col")
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, filter_col: rel.Column, operator: str,
                  other_col: rel.Column, scalar: int):
         super(Filter, self).__init__("filter", out_rel, parent)
@@ -689,6 +906,7 @@ class Filter(UnaryOpNode):
 
 # TODO rename
 class PubJoin(BinaryOpNode):
+    __slots__ = ("key_col", "host", "port", "is_server")
 
     def __init__(self, out_rel: rel.Relation, parent: OpNode, key_col: rel.Column, host: str, port: int,
                  is_server: bool, other_op_node: OpNode):
@@ -704,6 +922,7 @@ class PubJoin(BinaryOpNode):
 
 
 class Join(BinaryOpNode):
+    __slots__ = ("left_join_cols", "right_join_cols")
 
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode,
                  right_parent: OpNode, left_join_cols: list, right_join_cols: list):
@@ -723,6 +942,8 @@ class FilterBy(BinaryOpNode):
     Operator for filtering relations for rows which are in a set of values (specified in another relation).
     """
 
+    __slots__ = ("filter_col", "use_not_in")
+
     def __init__(self, out_rel: rel.Relation, input_op_node: OpNode,
                  by_op: OpNode, filter_col: rel.Column, use_not_in: bool):
         if len(by_op.out_rel.columns) != 1:
@@ -741,6 +962,8 @@ class IndexesToFlags(BinaryOpNode):
     TODO
     """
 
+    __slots__ = ("stage",)
+
     def __init__(self, out_rel: rel.Relation, input_op_node: OpNode,
                  lookup_op_node: OpNode, stage=0):
         # if len(lookup_op_node.out_rel.columns) != 1:
@@ -754,6 +977,8 @@ class Union(BinaryOpNode):
     Operator for union of given columns.
     """
 
+    __slots__ = ("left_col", "right_col")
+
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode,
                  right_parent: OpNode, left_col: rel.Column, right_col: rel.Column):
         super(Union, self).__init__("union", out_rel, left_parent, right_parent)
@@ -771,6 +996,8 @@ class PubIntersect(UnaryOpNode):
     Operator for intersection of given (public) columns.
     """
 
+    __slots__ = ("col", "host", "port", "is_server")
+
     def __init__(self, out_rel: rel.Relation,
                  parent: OpNode,
                  col: rel.Column,
@@ -795,6 +1022,8 @@ class JoinFlags(Join):
     otherwise.
     """
 
+    __slots__ = ()
+
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode,
                  right_parent: OpNode, left_join_cols: list, right_join_cols: list):
         super(JoinFlags, self).__init__(out_rel, left_parent,
@@ -818,6 +1047,8 @@ class JoinFlags(Join):
 class IndexJoin(Join):
     """TODO"""
 
+    __slots__ = ("index_rel",)
+
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode, right_parent: OpNode,
                  left_join_cols: list, right_join_cols: list, index_op: OpNode):
         super(IndexJoin, self).__init__(out_rel, left_parent,
@@ -841,6 +1072,8 @@ class FlagJoin(Join):
     JoinFlags operation.
     """
 
+    __slots__ = ("join_flag_op",)
+
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode, right_parent: OpNode,
                  left_join_cols: list, right_join_cols: list, join_flags_op: OpNode):
         super(FlagJoin, self).__init__(out_rel, left_parent, right_parent, left_join_cols, right_join_cols)
@@ -860,6 +1093,7 @@ class FlagJoin(Join):
 
 
 class PublicJoin(Join):
+    __slots__ = ()
 
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode, right_parent: OpNode,
                  left_join_cols: list, right_join_cols: list):
@@ -891,6 +1125,8 @@ class HybridJoin(Join):
     in both key columns
     """
 
+    __slots__ = ("trusted_party",)
+
     # TODO: (ben) trusted_party == pid (int) ?
     def __init__(self, out_rel: rel.Relation, left_parent: OpNode, right_parent: OpNode,
                  left_join_cols: list, right_join_cols: list, trusted_party):
@@ -913,6 +1149,8 @@ class HybridJoin(Join):
 class HybridAggregate(Aggregate):
     """ Object to store an aggregation assisted by a semi-trusted party over data. """
 
+    __slots__ = ("trusted_party",)
+
     def __init__(self, out_rel: rel.Relation, parent: OpNode, group_cols: list, agg_col: rel.Column, aggregator: str,
                  trusted_party: int):
         """ Initialize HybridAggregate object. """
@@ -978,7 +1216,7 @@ class Dag:
 
             children = node.children
             if deterministic:
-                children = sorted(list(children), key=lambda x: x.out_rel.name)
+                children = node.get_sorted_children()
             for other_node in children:
                 self._top_sort_visit(
                     other_node, marked, temp_marked, unmarked, ordered)
@@ -1013,6 +1251,48 @@ class OpDag(Dag):
 
     def __init__(self, roots: set):
         super(OpDag, self).__init__(roots)
+        self.invalidate_top_sort()
+
+    def cached_top_sort(self, reverse: bool = False):
+        """
+        Returns the (deterministic) topological ordering of this DAG, reusing the ordering computed by a previous
+        call as long as no node's parents or children have changed since. The returned list is shared and must not
+        be modified.
+        """
+        version = _structure_version
+        if self._top_sort_cache is None or self._top_sort_version != version:
+            self._top_sort_cache = self.top_sort()
+            self._top_sort_version = version
+            self._reversed_top_sort_cache = None
+            self._nodes_of_type_cache = {}
+        if not reverse:
+            return self._top_sort_cache
+        if self._reversed_top_sort_cache is None:
+            self._reversed_top_sort_cache = self._top_sort_cache[::-1]
+        return self._reversed_top_sort_cache
+
+    def nodes_of_type(self, op_types: tuple, reverse: bool = False):
+        """
+        Returns the nodes that are instances of any of op_types, in the order given by cached_top_sort. The result
+        is cached alongside the topological ordering and must not be modified.
+        """
+        key = (op_types, reverse)
+        ordered = self.cached_top_sort(reverse)
+        nodes = self._nodes_of_type_cache.get(key)
+        if nodes is None:
+            nodes = [node for node in ordered if isinstance(node, op_types)]
+            self._nodes_of_type_cache[key] = nodes
+        return nodes
+
+    def invalidate_top_sort(self):
+        """
+        Drops the cached topological ordering. Edge changes are detected automatically; this is only needed
+        after changing the DAG's roots.
+        """
+        self._top_sort_cache = None
+        self._top_sort_version = None
+        self._reversed_top_sort_cache = None
+        self._nodes_of_type_cache = {}
 
     def __str__(self):
         order = self.top_sort()
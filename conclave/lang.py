@@ -59,7 +59,7 @@ def aggregate(input_op_node: cc_dag.OpNode, output_name: str, group_col_names: l
     agg_out_col.name = agg_out_col_name
     out_rel_cols = [copy.deepcopy(group_col) for group_col in group_cols]
     out_rel_cols.append(copy.deepcopy(agg_out_col))
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -98,10 +98,10 @@ def aggregate_count(input_op_node: cc_dag.OpNode, output_name: str, group_col_na
     # aggregated. Note that we want copies as these are
     # copies on the output relation and changes to them
     # shouldn't affect the original columns
-    agg_out_col = Column(output_name, agg_out_col_name, len(group_cols), "INTEGER", set())
+    agg_out_col = Column(output_name, agg_out_col_name, len(group_cols), "INTEGER", 0)
     out_rel_cols = [copy.deepcopy(group_col) for group_col in group_cols]
     out_rel_cols.append(copy.deepcopy(agg_out_col))
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -185,10 +185,10 @@ def sort_by(input_op_node: cc_dag.OpNode, output_name: str, sort_by_col_name: st
     sort_by_col = utils.find(in_rel.columns, sort_by_col_name)
 
     for col in out_rel_cols:
-        col.trust_set = set()
+        col.trust_set = 0
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -210,9 +210,9 @@ def limit(input_op_node: cc_dag.OpNode, output_name: str, num: int):
     out_rel_cols = copy.deepcopy(in_rel.columns)
 
     for col in out_rel_cols:
-        col.coll_sets = set()
+        col.trust_set = 0
 
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     op = cc_dag.Limit(out_rel, input_op_node, num)
@@ -238,12 +238,12 @@ def project(input_op_node: cc_dag.OpNode, output_name: str, selected_col_names:
     # Find all columns by name
     selected_cols = [utils.find(in_rel.columns, col_name) for col_name in selected_col_names]
 
-    out_rel_cols = copy.deepcopy(selected_cols)
+    out_rel_cols = [col.clone() for col in selected_cols]
     for col in out_rel_cols:
-        col.trust_set = set()
+        col.trust_set = 0
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -273,10 +273,10 @@ def distinct(input_op_node: cc_dag.OpNode, output_name: str, selected_col_names:
 
     out_rel_cols = copy.deepcopy(selected_cols)
     for col in out_rel_cols:
-        col.trust_set = set()
+        col.trust_set = 0
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -307,10 +307,10 @@ def distinct_count(input_op_node: cc_dag.OpNode, output_name: str, selected_col_
 
     out_rel_cols = copy.deepcopy([selected_col])
     for col in out_rel_cols:
-        col.trust_set = set()
+        col.trust_set = 0
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -353,11 +353,11 @@ def divide(input_op_node: cc_dag.OpNode, output_name: str, target_col_name: str,
     else:
         # TODO: figure out new column's trust_set
         target_column = rel.Column(
-            output_name, target_col_name, len(in_rel.columns), "INTEGER", set())
+            output_name, target_col_name, len(in_rel.columns), "INTEGER", 0)
         out_rel_cols.append(target_column)
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -392,7 +392,7 @@ def filter_by(input_op_node: cc_dag.OpNode, output_name: str, filter_col_name: s
     filter_col = utils.find(in_rel.columns, filter_col_name)
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -413,7 +413,7 @@ def _indexes_to_flags(input_op_node: cc_dag.OpNode, lookup_op_node: cc_dag.OpNod
     out_rel_cols = [copy.deepcopy(in_rel.columns[0])]
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -433,7 +433,7 @@ def union(left_input_node: cc_dag.OpNode, right_input_node: cc_dag.OpNode, outpu
     """
 
     # Create output column and relation
-    out_col = Column(output_name, left_col_name, 0, "INTEGER", set())
+    out_col = Column(output_name, left_col_name, 0, "INTEGER", 0)
     left_stored_with = left_input_node.out_rel.stored_with
     right_stored_with = right_input_node.out_rel.stored_with
     out_rel = rel.Relation(output_name, [out_col], left_stored_with.union(right_stored_with))
@@ -461,9 +461,9 @@ def _pub_intersect(input_node: cc_dag.OpNode,
     """
 
     # Create output column and relation
-    out_col = Column(output_name, col_name, 0, "INTEGER", set())
+    out_col = Column(output_name, col_name, 0, "INTEGER", 0)
     left_stored_with = input_node.out_rel.stored_with
-    out_rel = rel.Relation(output_name, [out_col], copy.copy(left_stored_with))
+    out_rel = rel.Relation(output_name, [out_col], left_stored_with)
     out_rel.update_columns()
 
     left_col = utils.find(input_node.out_rel.columns, col_name)
@@ -506,7 +506,7 @@ def cc_filter(input_op_node: cc_dag.OpNode, output_name: str, filter_col_name: s
     other_col = utils.find(in_rel.columns, other_col_name) if other_col_name else None
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -548,11 +548,11 @@ def multiply(input_op_node: cc_dag.OpNode, output_name: str, target_col_name: st
         target_column = utils.find(in_rel.columns, target_col_name)
     else:
         # TODO: figure out new column's trust_set
-        target_column = rel.Column(output_name, target_col_name, len(in_rel.columns), "INTEGER", set())
+        target_column = rel.Column(output_name, target_col_name, len(in_rel.columns), "INTEGER", 0)
         out_rel_cols.append(target_column)
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -580,10 +580,10 @@ def _pub_join(input_op_node: cc_dag.OpNode, output_name: str, key_col_name: str,
     # Get index of filter column
     key_col = utils.find(in_rel.columns, key_col_name)
     assert key_col.idx == 0
-    # key_col.trust_set = set()
+    # key_col.trust_set = 0
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -608,7 +608,7 @@ def concat_cols(input_op_nodes: list, output_name: str, use_mult=False):
             out_rel_cols += copy.deepcopy(input_op_node.out_rel.columns)
 
     for col in out_rel_cols:
-        col.trust_set = set()
+        col.trust_set = 0
 
     # Get input relations from input nodes
     in_rels = [input_op_node.out_rel for input_op_node in input_op_nodes]
@@ -657,7 +657,7 @@ def join(left_input_node: cc_dag.OpNode, right_input_node: cc_dag.OpNode, output
             # Exclude key columns and add num from enumerate to start index
             if col.idx not in set(key_col_idxs):
                 new_col = rel.Column(
-                    output_name, col.get_name(), num + start_idx - len(key_col_idxs), col.type_str, set())
+                    output_name, col.get_name(), num + start_idx - len(key_col_idxs), col.type_str, 0)
                 result_cols.append(new_col)
 
         return result_cols
@@ -681,7 +681,7 @@ def join(left_input_node: cc_dag.OpNode, right_input_node: cc_dag.OpNode, output
     out_key_cols = []
     for i in range(len(left_join_cols)):
         out_key_cols.append(
-            rel.Column(output_name, left_join_cols[i].get_name(), i, left_join_cols[i].type_str, set()))
+            rel.Column(output_name, left_join_cols[i].get_name(), i, left_join_cols[i].type_str, 0))
 
     # Define output relation columns.
     # These will be the key columns followed
@@ -755,7 +755,7 @@ def concat(input_op_nodes: list, output_name: str, column_names: [list, None] =
         else:
             # we use the column names from the first input
             pass
-        col.trust_set = set()
+        col.trust_set = 0
 
     # The result of the concat will be stored with the union
     # of the parties storing the input relations
@@ -781,7 +781,7 @@ def blackbox(input_op_nodes: list, output_name: str, column_names: list, backend
     in_rels = [input_op_node.out_rel for input_op_node in input_op_nodes]
 
     # Create output columns
-    out_columns = [Column(output_name, col_name, idx, "INTEGER", set()) for idx, col_name in enumerate(column_names)]
+    out_columns = [Column(output_name, col_name, idx, "INTEGER", 0) for idx, col_name in enumerate(column_names)]
 
     # Create out rel
     in_stored_with = [in_rel.stored_with for in_rel in in_rels]
@@ -815,11 +815,11 @@ def index(input_op_node: cc_dag.OpNode, output_name: str, idx_col_name: str = "i
 
     # TODO should be 0?
     index_col = rel.Column(
-        output_name, idx_col_name, len(in_rel.columns), "INTEGER", set())
+        output_name, idx_col_name, len(in_rel.columns), "INTEGER", 0)
     out_rel_cols = [index_col] + out_rel_cols
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     op = cc_dag.Index(out_rel, input_op_node, idx_col_name)
@@ -834,11 +834,11 @@ def num_rows(input_op_node: cc_dag.OpNode, output_name: str, col_name: str = "le
     in_rel = input_op_node.out_rel
     # Copy over columns from existing relation
     len_col = rel.Column(
-        output_name, col_name, len(in_rel.columns), "INTEGER", set())
+        output_name, col_name, len(in_rel.columns), "INTEGER", 0)
     out_rel_cols = [len_col]
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     op = cc_dag.NumRows(out_rel, input_op_node, len_col)
@@ -872,10 +872,10 @@ def shuffle(input_op_node: cc_dag.OpNode, output_name: str):
     in_rel = input_op_node.out_rel
 
     # Copy over columns from existing relation
-    out_rel_cols = copy.deepcopy(in_rel.columns)
+    out_rel_cols = [col.clone() for col in in_rel.columns]
 
     # Create output relation
-    out_rel = rel.Relation(output_name, out_rel_cols, copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, out_rel_cols, in_rel.stored_with)
     out_rel.update_columns()
 
     op = cc_dag.Shuffle(out_rel, input_op_node)
@@ -918,13 +918,12 @@ def _comp_neighs(input_op_node: cc_dag.OpNode, output_name: str, comp_col_name:
     out_rel_cols = copy.deepcopy(in_rel.columns)
 
     comp_col = utils.find(in_rel.columns, comp_col_name)
-    comp_col.stored_with = set()
 
     for col in out_rel_cols:
-        col.trust_set = set()
+        col.trust_set = 0
 
     # Create output relation
-    out_rel = rel.Relation(output_name, [copy.deepcopy(comp_col)], copy.copy(in_rel.stored_with))
+    out_rel = rel.Relation(output_name, [copy.deepcopy(comp_col)], in_rel.stored_with)
     out_rel.update_columns()
 
     # Create our operator node
@@ -973,7 +972,7 @@ def _persist(input_op_node: cc_dag.OpNode, output_name: str):
     :return: Persist OpNode.
     """
 
-    out_rel = copy.deepcopy(input_op_node.out_rel)
+    out_rel = input_op_node.out_rel.clone()
     out_rel.rename(output_name)
     persist_op = cc_dag.Persist(out_rel, input_op_node)
     input_op_node.children.add(persist_op)
@@ -990,7 +989,7 @@ def _close(input_op_node: cc_dag.OpNode, output_name: str, target_parties: set):
     :return: Close OpNode.
     """
 
-    out_rel = copy.deepcopy(input_op_node.out_rel)
+    out_rel = input_op_node.out_rel.clone()
     out_rel.stored_with = target_parties
     out_rel.rename(output_name)
     close_op = cc_dag.Close(out_rel, input_op_node)
@@ -1008,7 +1007,7 @@ def _open(input_op_node: cc_dag.OpNode, output_name: str, target_party: int):
     :return: Open OpNode.
     """
 
-    out_rel = copy.deepcopy(input_op_node.out_rel)
+    out_rel = input_op_node.out_rel.clone()
     out_rel.stored_with = {target_party}
     out_rel.rename(output_name)
     open_op = cc_dag.Open(out_rel, input_op_node)
@@ -1046,7 +1045,7 @@ def _flag_join(left_input_node: cc_dag.OpNode, right_input_node: cc_dag.OpNode,
     TODO rename
     """
     node_out_rel = left_input_node.out_rel
-    out_rel = rel.Relation(output_name, copy.deepcopy(node_out_rel.columns), copy.copy(node_out_rel.stored_with))
+    out_rel = rel.Relation(output_name, copy.deepcopy(node_out_rel.columns), node_out_rel.stored_with)
     flag_join_op = cc_dag.FlagJoin(out_rel, left_input_node, right_input_node, [], [], join_flags_op_node)
 
     left_input_node.children.add(flag_join_op)
@@ -1,4 +1,4 @@
-from copy import copy, deepcopy
+from copy import copy
 
 from conclave.codegen.scotch import ScotchCodeGen
 from conclave.config import CodeGenConfig
@@ -31,7 +31,7 @@ def heupart(dag: Dag, mpc_frameworks: list, local_frameworks: list):
         """ Returns whether the Dag passed to it can be partitioned. """
 
         # copy so we don't overwrite global available nodes in this pass
-        available = deepcopy(top_available)
+        available = copy(top_available)
         ordered = dag.top_sort()
         unavailable = set()
 
@@ -57,7 +57,7 @@ def heupart(dag: Dag, mpc_frameworks: list, local_frameworks: list):
                 if parent in available:
                     create_op = None
                     if parent not in previous_parents:
-                        create_op = Create(deepcopy(parent.out_rel))
+                        create_op = Create(parent.out_rel.clone())
                         # create op is in same mode as root
                         create_op.is_mpc = root.is_mpc
                         previous_parents.add(parent)
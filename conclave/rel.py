@@ -3,13 +3,19 @@ Data structures to represent relations (i.e., data sets).
 """
 import conclave.utils as utils
 
+# Canonical frozenset for each distinct stored_with value, so that relations owned by the same parties share one
+# object no matter how the party set was passed in.
+_party_sets = {}
+
 
 class Column:
     """
     Column data structure.
     """
 
-    def __init__(self, rel_name: str, name: str, idx: int, type_str: str, trust_set: set):
+    __slots__ = ("rel_name", "name", "idx", "type_str", "trust_set")
+
+    def __init__(self, rel_name: str, name: str, idx: int, type_str: str, trust_set):
         """
         Initialize object.
 
@@ -17,7 +23,8 @@ class Column:
         :param name: name of column
         :param idx: integer index of the column in the relation
         :param type_str: describes type of values in column (currently only "INTEGER" supported)
-        :param trust_set: parties trusted to learn this column in the clear
+        :param trust_set: parties trusted to learn this column in the clear, either as a
+        bitmask or as a set of party IDs
         """
         if type_str not in {"INTEGER"}:
             raise Exception("Type not supported {}".format(type_str))
@@ -25,7 +32,7 @@ class Column:
         self.name = name
         self.idx = idx
         self.type_str = type_str
-        self.trust_set = trust_set
+        self.trust_set = trust_set if isinstance(trust_set, int) else utils.set_to_trust_set(trust_set)
 
     def get_name(self):
         """Return column name."""
@@ -37,10 +44,14 @@ class Column:
 
     def dbg_str(self):
         """Return column name and trust set as string."""
-        coll_set_str = " ".join(sorted([str(party) for party in self.trust_set]))
+        coll_set_str = " ".join(sorted([str(party) for party in utils.trust_set_to_set(self.trust_set)]))
         return self.get_name() + " " + "{" + coll_set_str + "}"
 
-    def merge_coll_sets_in(self, other_coll_sets: set):
+    def clone(self):
+        """Return a copy of this column."""
+        return Column(self.rel_name, self.name, self.idx, self.type_str, self.trust_set)
+
+    def merge_coll_sets_in(self, other_coll_sets: int):
         """Merge collusion sets into column."""
         self.trust_set = utils.merge_coll_sets(self.trust_set, other_coll_sets)
 
@@ -54,12 +65,28 @@ class Relation:
     Relation data structure.
     """
 
+    __slots__ = ("name", "columns", "_stored_with")
+
     def __init__(self, name: str, columns: list, stored_with: set):
         """Initialize object."""
         self.name = name
         self.columns = columns
         self.stored_with = stored_with  # Ownership of this data set. Does this refer to secret shares or open data?
 
+    @property
+    def stored_with(self):
+        """Parties that store this relation, as a frozenset that can be shared between relations without copying."""
+        return self._stored_with
+
+    @stored_with.setter
+    def stored_with(self, parties: set):
+        parties = frozenset(parties)
+        self._stored_with = _party_sets.setdefault(parties, parties)
+
+    def clone(self):
+        """Return a copy of this relation with cloned columns."""
+        return Relation(self.name, [col.clone() for col in self.columns], self.stored_with)
+
     def rename(self, new_name):
         """Rename relation."""
         self.name = new_name
@@ -88,7 +115,7 @@ class Relation:
     def dbg_str(self):
         """Return extended string representation for debugging."""
         col_str = ", ".join([col.dbg_str() for col in self.columns])
-        return "{}([{}]) {}".format(self.name, col_str, self.stored_with)
+        return "{}([{}]) {}".format(self.name, col_str, set(self.stored_with))
 
     def __str__(self):
         """Return string representation of relation."""
@@ -1,31 +1,79 @@
 """
 Functions for working with collusion set annotations.
 
+Trust sets are stored as integer bitmasks: party p is in the trust set
+if bit p is set.
+
 TODO: Turn this into a dedicated module for working with collusion sets.
 """
 import copy
 import functools
+import operator
 import warnings
 
 
-def merge_coll_sets(left: set, right: set):
+def set_to_trust_set(parties):
+    """
+    Convert an iterable of party IDs to a trust set bitmask.
+
+    >>> set_to_trust_set({1, 2})
+    6
+    >>> set_to_trust_set(set())
+    0
+    """
+    mask = 0
+    for party in parties:
+        mask |= 1 << party
+    return mask
+
+
+def trust_set_to_set(mask: int):
+    """
+    Convert a trust set bitmask to the set of party IDs it contains.
+
+    >>> trust_set_to_set(6) == {1, 2}
+    True
+    >>> trust_set_to_set(0) == set()
+    True
+    """
+    parties = set()
+    party = 0
+    while mask:
+        if mask & 1:
+            parties.add(party)
+        mask >>= 1
+        party += 1
+    return parties
+
+
+def min_party(mask: int):
+    """
+    Return the lowest party ID in a non-empty trust set bitmask.
+
+    >>> min_party(set_to_trust_set({2, 3}))
+    2
+    """
+    return (mask & -mask).bit_length() - 1
+
+
+def merge_coll_sets(left: int, right: int):
     """
     Merge two collusion records if possible.
     :param left: collusion record
     :param right: collusion record
     :returns: all combinations of collusion sets from records
 
-    >>> left = {1, 2}
-    >>> right = {2, 3, 4}
+    >>> left = set_to_trust_set({1, 2})
+    >>> right = set_to_trust_set({2, 3, 4})
     >>> actual = merge_coll_sets(left, right)
-    >>> expected = {2}
+    >>> expected = set_to_trust_set({2})
     >>> actual == expected
     True
 
-    >>> left = {1, 2}
-    >>> right = set()
+    >>> left = set_to_trust_set({1, 2})
+    >>> right = 0
     >>> actual = merge_coll_sets(left, right)
-    >>> expected = set()
+    >>> expected = 0
     >>> actual == expected
     True
     """
@@ -39,19 +87,18 @@ def trust_set_from_columns(columns: list):
     >>> class FakeCol:
     ...     def __init__(self, trust_set):
     ...         self.trust_set = trust_set
-    >>> columns = [FakeCol({1, 2}), FakeCol({2})]
+    >>> columns = [FakeCol(0b110), FakeCol(0b100)]
     >>> actual = trust_set_from_columns(columns)
-    >>> expected = {2}
+    >>> expected = 0b100
     >>> actual == expected
     True
-    >>> columns = [FakeCol({1, 2}), FakeCol({2}), "dummy"]
+    >>> columns = [FakeCol(0b110), FakeCol(0b100), "dummy"]
     >>> actual = trust_set_from_columns(columns)
-    >>> expected = {2}
+    >>> expected = 0b100
     >>> actual == expected
     True
     """
-    coll_sets = [copy.copy(col.trust_set) for col in columns if hasattr(col, "trust_set")]
-    return functools.reduce(lambda set_a, set_b: merge_coll_sets(set_a, set_b), coll_sets)
+    return functools.reduce(operator.and_, [col.trust_set for col in columns if hasattr(col, "trust_set")])
 
 
 def find(columns: list, col_name: str):
@@ -61,11 +108,11 @@ def find(columns: list, col_name: str):
     :param col_name: name of column to return
     :returns: column
     """
-    try:
-        return next(iter([col for col in columns if col.get_name() == col_name]))
-    except StopIteration:
+    # stop at the first match rather than collecting every column with that name
+    found = next((col for col in columns if col.name == col_name), None)
+    if found is None:
         print("column '{}' not found in {}".format(col_name, [c.get_name() for c in columns]))
-        return None
+    return found
 
 
 def defCol(name: str, typ: str, *coll_sets):
@@ -1,55 +1,43 @@
 from conclave import CodeGenConfig
 from conclave import generate_and_dispatch
-from conclave.config import JiffConfig
 from conclave.config import NetworkConfig
-from conclave.config import OblivcConfig
-from conclave.config import SparkConfig
 
 
 def setup(conf: dict):
     # GENERAL
-    pid = int(conf["user_config"]["pid"])
-    workflow_name = conf["user_config"]["workflow_name"]
-    all_pids = conf["user_config"]['all_pids']
-    use_leaky = conf["user_config"]["leaky_ops"]
-    use_floats = conf["user_config"]["use_floats"]
+    user_config = conf["user_config"]
+    pid = int(user_config["pid"])
+    workflow_name = user_config["workflow_name"]
+    all_pids = user_config['all_pids']
+    use_leaky = user_config["leaky_ops"]
+    use_floats = user_config["use_floats"]
 
     conclave_config = CodeGenConfig(workflow_name)
+    backends = conf.get("backends", {})
 
     # SPARK
-    try:
-        spark_avail = conf["backends"]["spark"]["available"]
-        if spark_avail:
-            spark_master_url = conf["backends"]["spark"]["master_url"]
-            spark_config = SparkConfig(spark_master_url)
-            conclave_config.with_spark_config(spark_config)
-    except KeyError:
-        pass
+    spark = backends.get("spark", {})
+    if spark.get("available"):
+        from conclave.config import SparkConfig
+        spark_config = SparkConfig(spark["master_url"])
+        conclave_config.with_spark_config(spark_config)
 
     # OBLIV-C
-    try:
-        oc_avail = conf["backends"]["oblivc"]["available"]
-        if oc_avail:
-            oc_path = conf["backends"]["oblivc"]["oc_path"]
-            ip_port = conf["backends"]["oblivc"]["ip_port"]
-            oc_config = OblivcConfig(oc_path, ip_port)
-            conclave_config.with_oc_config(oc_config)
-    except KeyError:
-        pass
+    oblivc = backends.get("oblivc", {})
+    if oblivc.get("available"):
+        from conclave.config import OblivcConfig
+        oc_config = OblivcConfig(oblivc["oc_path"], oblivc["ip_port"])
+        conclave_config.with_oc_config(oc_config)
 
     # JIFF
-    try:
-        jiff_avail = conf["backends"]["jiff"]["available"]
-        if jiff_avail:
-            jiff_path = conf["backends"]["jiff"]["jiff_path"]
-            party_count = len(all_pids)
-            server_ip = conf["backends"]["jiff"]["server_ip"]
-            server_pid = conf["backends"]["jiff"]["server_pid"]
-            server_port = conf["backends"]["jiff"]["server_port"]
-            jiff_config = JiffConfig(jiff_path, party_count, server_ip, server_port, server_pid)
-            conclave_config.with_jiff_config(jiff_config)
-    except KeyError:
-        pass
+    jiff = backends.get("jiff", {})
+    if jiff.get("available"):
+        from conclave.config import JiffConfig
+        party_count = len(all_pids)
+        jiff_config = JiffConfig(
+            jiff["jiff_path"], party_count, jiff["server_ip"], jiff["server_port"], jiff["server_pid"]
+        )
+        conclave_config.with_jiff_config(jiff_config)
 
     # NET
     hosts = conf["net"]["parties"]
@@ -62,9 +50,10 @@ def setup(conf: dict):
     conclave_config.use_leaky_ops = use_leaky
     conclave_config.use_floats = use_floats
 
-    conclave_config.code_path = conf["user_config"]["paths"]["code_path"]
-    conclave_config.output_path = conf["user_config"]["paths"]["output_path"]
-    conclave_config.input_path = conf["user_config"]["paths"]["input_path"]
+    paths = user_config["paths"]
+    conclave_config.code_path = paths["code_path"]
+    conclave_config.output_path = paths["output_path"]
+    conclave_config.input_path = paths["input_path"]
 
     return conclave_config
 